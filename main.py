@@ -1,29 +1,30 @@
 import os
-import shutil
+import sys
 
-def copy_files(source, destination):
-    os.makedirs(destination, exist_ok=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
-    for root, dirs, files in os.walk(source):
-        for file in files:
-            if '.git' in root:
-                continue
-            source_file = os.path.join(root, file)
+from manifest import load_manifest, save_manifest
+from sync import sync_files
 
-            relative_path = os.path.relpath(source_file, source)
-            destination_file = os.path.join(destination, relative_path)
+MANIFEST_PATH = ".sitegen-manifest.json"
 
-            os.makedirs(os.path.dirname(destination_file), exist_ok=True)
 
-            shutil.copy(source_file, destination_file)
-            print(f"Moved {source_file} to {destination_file}")
+def copy_files(source, destination, manifest=None, use_hash=False):
+    # Copy new and changed files from source to destination
+    # With a manifest, files whose source was deleted since the last run are removed
+    previous = manifest["assets"] if manifest is not None else None
+    synced, stats = sync_files(source, destination, previous, use_hash)
+    if manifest is not None:
+        manifest["assets"] = synced
+    return stats
 
 def main():
 
-    copy_files("static", "public")
+    manifest = load_manifest(MANIFEST_PATH)
+    copy_files("static", "public", manifest)
+    save_manifest(manifest, MANIFEST_PATH)
 
 
 
 if __name__ == "__main__":
     main()
-
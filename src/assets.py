@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from manifest import hash_file
+from output import OutputFile
+
+# HTML files are entry points and keep their names
+FINGERPRINT_EXTENSIONS = (
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+    ".woff", ".woff2", ".ttf", ".otf", ".mp4", ".webm", ".mp3", ".pdf",
+)
+ATTRIBUTE_PATTERN = re.compile(r"""\b(src|href)=(["'])([^"']*)\2""")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Maps site paths like /images/a.png to their fingerprinted paths while
+# fingerprinting is on; asset_salt changes whenever the mapping does
+asset_urls = {}
+asset_salt = ""
+# The route of the page being rendered, which relative URLs resolve against
+page_route = "/index.html"
+
+
+def set_asset_urls(urls):
+    global asset_urls, asset_salt
+    asset_urls = urls
+    if urls:
+        asset_salt = hashlib.sha256(json.dumps(urls, sort_keys=True).encode()).hexdigest()[:16]
+    else:
+        asset_salt = ""
+
+
+def set_page_route(route):
+    global page_route
+    page_route = route
+
+
+def fingerprinted_name(relative_path, digest):
+    # images/a.png -> images/a.<hash>.png
+    root, ext = os.path.splitext(relative_path)
+    return f"{root}.{digest[:10]}{ext}"
+
+
+class Fingerprinter:
+    # Renames static files to content-hashed names for sync_files
+    # known maps relative paths to [mtime_ns, size, digest] from the last
+    # build, so unchanged files are not hashed again
+    def __init__(self, known=None):
+        self.known = known or {}
+        self.fingerprints = {}
+        self.urls = {}
+
+    def __call__(self, relative_path, source_file, source_stat):
+        if not relative_path.endswith(FINGERPRINT_EXTENSIONS):
+            return relative_path
+        state = self.known.get(relative_path)
+        if state is not None and state[:2] == [source_stat.st_mtime_ns, source_stat.st_size]:
+            digest = state[2]
+        else:
+            digest = hash_file(source_file)
+        self.fingerprints[relative_path] = [source_stat.st_mtime_ns, source_stat.st_size, digest]
+        renamed = fingerprinted_name(relative_path, digest)
+        url = "/" + relative_path.replace(os.sep, "/")
+        self.urls[url] = "/" + renamed.replace(os.sep, "/")
+        return renamed
+
+
+def split_url(url):
+    # Split a URL into its path and its ?query#fragment suffix
+    end = len(url)
+    for mark in "?#":
+        index = url.find(mark)
+        if index != -1 and index < end:
+            end = index
+    return url[:end], url[end:]
+
+
+def site_path(path, route=None):
+    # Return the site path a local URL points at, or None for other sites
+    # Relative URLs are resolved against the directory of route, by default
+    # the page being rendered
+    if "://" in path or path.startswith("//") or path.startswith("data:"):
+        return None
+    if path.startswith("/"):
+        return path
+    return posixpath.normpath(posixpath.join(posixpath.dirname(route or page_route), path))
+
+
+def asset_url(url, route=None, urls=None):
+    # Return the fingerprinted form of a URL that points at a static asset
+    # Relative URLs stay relative to the page at route
+    urls = asset_urls if urls is None else urls
+    if not urls:
+        return url
+    path, suffix = split_url(url)
+    renamed = urls.get(site_path(path, route))
+    if renamed is None:
+        return url
+    if not path.startswith("/"):
+        renamed = posixpath.relpath(renamed, posixpath.dirname(route or page_route))
+    return renamed + suffix
+
+
+def rewrite_references(html, route=None, urls=None):
+    # Point every src and href attribute at the fingerprinted assets
+    urls = asset_urls if urls is None else urls
+    if not urls:
+        return html
+
+    def replace(match):
+        return f"{match.group(1)}={match.group(2)}{asset_url(match.group(3), route, urls)}{match.group(2)}"
+
+    return ATTRIBUTE_PATTERN.sub(replace, html)
+
+
+def write_asset_manifest(urls, path):
+    # Like every output, left untouched when unchanged
+    with OutputFile(path) as f:
+        json.dump(urls, f, indent=1, sort_keys=True)
+
+
+def write_headers(urls, path):
+    # Write a _headers file marking fingerprinted assets as immutable
+    with OutputFile(path) as f:
+        for url in sorted(urls.values()):
+            f.write(f"{url}\n  Cache-Control: {IMMUTABLE_CACHE_CONTROL}\n")
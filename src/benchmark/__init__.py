@@ -0,0 +1 @@
+# Benchmarks for sitegen, run from src/ with: python3 -m benchmark.<name>
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+from benchmark.corpus import CORPORA, generate_corpus, write_static
+from benchmark.stages import run_copy_stage, run_page_stages
+
+
+def run(corpora, scale, repeat):
+    # Run every stage over every corpus and return {"corpus/stage": seconds}
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in corpora:
+            pages = generate_corpus(name, scale)
+            size = sum(len(markdown) for path, markdown in pages)
+            print(f"{name}: {len(pages)} files, {size / 1e6:.1f} MB")
+            for stage, seconds in run_page_stages(pages, work_dir, repeat).items():
+                results[f"{name}/{stage}"] = seconds
+        static_dir = os.path.join(work_dir, "static")
+        write_static(static_dir, max(1, int(500 * scale)), 64 * 1024)
+        for stage, seconds in run_copy_stage(static_dir, work_dir, repeat).items():
+            results[f"static/{stage}"] = seconds
+    return results
+
+
+def compare(results, baseline, threshold, min_time=0.0):
+    # Print each timing next to the baseline and return the regressed keys
+    # Stages faster than min_time in the baseline are too noisy to flag
+    regressions = []
+    print(f"{'stage':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, seconds in results.items():
+        old = baseline.get(key)
+        if old is None:
+            print(f"{key:<40} {'-':>10} {seconds * 1000:>8.1f}ms")
+            continue
+        change = (seconds - old) / old if old > 0 else 0.0
+        flag = ""
+        if change > threshold and old >= min_time:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<40} {old * 1000:>8.1f}ms {seconds * 1000:>8.1f}ms {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sitegen stage by stage")
+    parser.add_argument("--corpus", action="append", choices=CORPORA, help="corpus to run (default: all)")
+    parser.add_argument("--scale", type=float, default=0.1, help="corpus size factor, 1.0 is full size (default: 0.1)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the fastest counts (default: 3)")
+    parser.add_argument("--baseline", default="benchmark-baseline.json", help="baseline file to compare with or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown that counts as a regression (default: 0.1)")
+    parser.add_argument("--min-time", type=float, default=0.005, help="ignore stages faster than this many seconds (default: 0.005)")
+    args = parser.parse_args(argv)
+
+    results = run(args.corpus or CORPORA, args.scale, args.repeat)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "scale": args.scale,
+                "results": results,
+            }, f, indent=1, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored.get("scale") != args.scale:
+            print(f"Baseline was recorded at scale {stored.get('scale')}, not {args.scale}; not comparing")
+        else:
+            baseline = stored["results"]
+    regressions = compare(results, baseline, args.threshold, args.min_time)
+    if regressions:
+        print(f"{len(regressions)} stages regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
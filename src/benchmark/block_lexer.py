@@ -0,0 +1,64 @@
+import gc
+import sys
+import time
+import tracemalloc
+
+from benchmark.corpus import generate_corpus
+from delimiter import (
+    block_to_block_type,
+    block_to_html_node,
+    lex_blocks,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+from htmlnode import ParentNode
+
+
+def copy_blocks(markdown):
+    # The string-based block pass: one stripped copy per block, then splitlines per block
+    blocks = markdown_to_blocks(markdown)
+    return [(block, block_to_block_type(block)) for block in blocks]
+
+
+def copy_html_node(markdown):
+    nodes = []
+    for block, block_type in copy_blocks(markdown):
+        node = block_to_html_node(block, block_type)
+        if node is not None:
+            nodes.append(node)
+    return ParentNode("div", nodes)
+
+
+def measure(func, markdown, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(markdown)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del result
+    tracemalloc.start()
+    result = func(markdown)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, current, peak
+
+
+def run(scale=1.0, repeat=3):
+    for name in ("huge", "list-heavy"):
+        markdown = "\n\n".join(text for path, text in generate_corpus(name, scale))
+        print(f"{name}: {len(markdown) / 1e6:.1f} MB of markdown")
+        print(f"  {'stage':<34} {'time':>9} {'kept':>10} {'peak':>10}")
+        for label, func in (
+            ("blocks as copies", copy_blocks),
+            ("blocks as spans (lex_blocks)", lex_blocks),
+            ("html tree from copies", copy_html_node),
+            ("html tree from spans", markdown_to_html_node),
+        ):
+            elapsed, kept, peak = measure(func, markdown, repeat)
+            print(f"  {label:<34} {elapsed * 1000:>7.1f}ms {kept / 1e6:>8.2f}MB {peak / 1e6:>8.2f}MB")
+
+
+if __name__ == "__main__":
+    run(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
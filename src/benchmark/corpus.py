@@ -0,0 +1,112 @@
+import os
+import random
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog site generator markdown page "
+    "static content build render template link image list item code block "
+    "performance cache manifest output docs guide reference release notes"
+).split()
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + "."
+
+
+def inline_text(rng, length, link_ratio=0.05):
+    # A line of prose sprinkled with bold, italic, code, links and images
+    parts = []
+    for i in range(length):
+        roll = rng.random()
+        word = rng.choice(WORDS)
+        if roll < link_ratio:
+            parts.append(f"[{word}](/docs/{word}-{rng.randrange(1000)}.html)")
+        elif roll < link_ratio + 0.01:
+            parts.append(f"![{word}](/images/{word}.png)")
+        elif roll < link_ratio + 0.05:
+            parts.append(f"**{word}**")
+        elif roll < link_ratio + 0.08:
+            parts.append(f"*{word}*")
+        elif roll < link_ratio + 0.1:
+            parts.append(f"`{word}`")
+        else:
+            parts.append(word)
+    return " ".join(parts)
+
+
+def blog_page(rng, index):
+    blocks = [f"# Post {index}: {sentence(rng, 4)}"]
+    for _ in range(rng.randint(4, 10)):
+        roll = rng.random()
+        if roll < 0.1:
+            blocks.append(f"## {sentence(rng, 3)}")
+        elif roll < 0.2:
+            blocks.append("> " + inline_text(rng, 20))
+        elif roll < 0.3:
+            blocks.append("```\n" + "\n".join(sentence(rng, 6) for _ in range(4)) + "\n```")
+        else:
+            blocks.append("\n".join(inline_text(rng, 15) for _ in range(rng.randint(1, 4))))
+    return "\n\n".join(blocks) + "\n"
+
+
+def link_heavy_page(rng, index):
+    blocks = [f"# Links {index}"]
+    for _ in range(20):
+        blocks.append(inline_text(rng, 60, link_ratio=0.5))
+    return "\n\n".join(blocks) + "\n"
+
+
+def list_heavy_page(rng, index):
+    blocks = [f"# Lists {index}"]
+    for _ in range(10):
+        items = [f"- {inline_text(rng, 8)}" for _ in range(rng.randint(5, 20))]
+        blocks.append("\n".join(items))
+        items = [f"{n + 1}. {inline_text(rng, 8)}" for n in range(rng.randint(5, 20))]
+        blocks.append("\n".join(items))
+    return "\n\n".join(blocks) + "\n"
+
+
+def tiny_page(rng, index):
+    return f"# Note {index}\n\n{sentence(rng, 8)}\n"
+
+
+def generate_corpus(name, scale=1.0, seed=1):
+    # Return a reproducible corpus as a list of (relative path, markdown) pairs
+    rng = random.Random(f"{name}-{seed}")
+    if name == "blog":
+        count = max(1, int(1000 * scale))
+        return [(f"posts/{i // 100}/post-{i}.md", blog_page(rng, i)) for i in range(count)]
+    if name == "link-heavy":
+        count = max(1, int(300 * scale))
+        return [(f"links/page-{i}.md", link_heavy_page(rng, i)) for i in range(count)]
+    if name == "list-heavy":
+        count = max(1, int(300 * scale))
+        return [(f"lists/page-{i}.md", list_heavy_page(rng, i)) for i in range(count)]
+    if name == "huge":
+        pages = max(1, int(2000 * scale))
+        return [("huge.md", "\n\n".join(blog_page(rng, i) for i in range(pages)))]
+    if name == "tiny":
+        count = max(1, int(100000 * scale))
+        return [(f"notes/{i // 1000}/note-{i}.md", tiny_page(rng, i)) for i in range(count)]
+    raise ValueError(f"Unknown corpus: {name}")
+
+
+CORPORA = ["blog", "link-heavy", "list-heavy", "huge", "tiny"]
+
+
+def write_corpus(pages, dir_path):
+    # Write a corpus to disk as a content directory
+    for relative_path, markdown in pages:
+        path = os.path.join(dir_path, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(markdown)
+
+
+def write_static(dir_path, files, size, seed=1):
+    # Write a static directory of files with random contents
+    rng = random.Random(seed)
+    for i in range(files):
+        path = os.path.join(dir_path, f"assets/{i // 50}/file-{i}.bin")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(rng.randbytes(size))
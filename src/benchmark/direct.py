@@ -0,0 +1,43 @@
+import time
+
+from benchmark.corpus import CORPORA, generate_corpus
+from delimiter import markdown_to_html, markdown_to_html_node
+
+
+def tree_render(markdown, links, texts):
+    return markdown_to_html_node(markdown, links, texts).to_html()
+
+
+def best_of(func, markdowns, repeat, collect):
+    # Return the fastest of several timed runs over all pages, optionally
+    # collecting links and texts the way a build does
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for markdown in markdowns:
+            if collect:
+                func(markdown, [], [])
+            else:
+                func(markdown, None, None)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(scale=0.2, repeat=5):
+    print(f"{'corpus':<24} {'tree':>10} {'direct':>10} {'speedup':>8} {'MB/s':>8}")
+    for name in CORPORA:
+        markdowns = [markdown for path, markdown in generate_corpus(name, scale)]
+        for markdown in markdowns:
+            if markdown_to_html(markdown) != markdown_to_html_node(markdown).to_html():
+                raise AssertionError(f"Renderers disagree on the {name} corpus")
+        size = sum(len(markdown) for markdown in markdowns)
+        for collect in (False, True):
+            label = f"{name}, collecting" if collect else name
+            old = best_of(tree_render, markdowns, repeat, collect)
+            new = best_of(markdown_to_html, markdowns, repeat, collect)
+            print(f"{label:<24} {old * 1000:>8.1f}ms {new * 1000:>8.1f}ms {old / new:>7.2f}x {size / new / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+import contextlib
+import time
+
+import htmlnode
+import textnode
+from benchmark.corpus import CORPORA, generate_corpus
+from delimiter import markdown_to_html_node
+
+
+@contextlib.contextmanager
+def unescaped():
+    # Swap the escaping functions for ones that pass values through, giving
+    # the renderer as it was before escaping
+    saved = (htmlnode.escape_text, htmlnode.escape_attribute, textnode.escape_text, textnode.escape_attribute)
+    passthrough = lambda value: value
+    htmlnode.escape_text = htmlnode.escape_attribute = passthrough
+    textnode.escape_text = textnode.escape_attribute = passthrough
+    try:
+        yield
+    finally:
+        htmlnode.escape_text, htmlnode.escape_attribute, textnode.escape_text, textnode.escape_attribute = saved
+
+
+def best_of(trees, repeat):
+    # Return the fastest of several timed renders of all trees
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tree in trees:
+            tree.to_html()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(scale=0.1, repeat=5):
+    documents = {name: [markdown for path, markdown in generate_corpus(name, scale)] for name in CORPORA}
+    # Every word needing escaping is the worst case for the slow path
+    documents["special characters"] = [
+        markdown.replace("the ", "<the> & ") for markdown in documents["blog"]
+    ]
+    print(f"{'corpus':<20} {'unescaped':>12} {'escaped':>12} {'overhead':>9}")
+    for name, pages in documents.items():
+        trees = [markdown_to_html_node(markdown) for markdown in pages]
+        with unescaped():
+            old = best_of(trees, repeat)
+        new = best_of(trees, repeat)
+        print(f"{name:<20} {old * 1000:>10.1f}ms {new * 1000:>10.1f}ms {(new - old) / old:>+8.0%}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,58 @@
+import random
+import time
+
+from delimiter import text_to_textnodes, text_to_textnodes_multipass
+
+
+def make_paragraph(rng, words, link_ratio):
+    # Build a paragraph of plain words mixed with inline markdown
+    parts = []
+    for i in range(words):
+        roll = rng.random()
+        if roll < link_ratio:
+            parts.append(f"[link {i}](https://example.com/docs/page-{i}.html)")
+        elif roll < link_ratio * 1.2:
+            parts.append(f"![image {i}](/images/figure-{i}.png)")
+        elif roll < link_ratio * 1.2 + 0.05:
+            parts.append(f"**bold {i}**")
+        elif roll < link_ratio * 1.2 + 0.08:
+            parts.append(f"*italic {i}*")
+        elif roll < link_ratio * 1.2 + 0.1:
+            parts.append(f"`code {i}`")
+        else:
+            parts.append(f"word{i}")
+    return " ".join(parts)
+
+
+def best_of(func, texts, repeat):
+    # Return the fastest of several timed runs over all texts
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(repeat=5):
+    rng = random.Random(42)
+    corpora = {
+        "prose": [make_paragraph(rng, 120, 0.01) for _ in range(200)],
+        "link-heavy": [make_paragraph(rng, 120, 0.4) for _ in range(200)],
+        "one huge paragraph": [make_paragraph(rng, 20000, 0.4)],
+    }
+    print(f"{'corpus':<20} {'multipass':>12} {'single scan':>12} {'speedup':>8} {'MB/s':>8}")
+    for name, texts in corpora.items():
+        for text in texts:
+            if text_to_textnodes(text) != text_to_textnodes_multipass(text):
+                raise AssertionError(f"Inline parsers disagree on the {name} corpus")
+        size = sum(len(text) for text in texts)
+        old = best_of(text_to_textnodes_multipass, texts, repeat)
+        new = best_of(text_to_textnodes, texts, repeat)
+        print(f"{name:<20} {old * 1000:>10.1f}ms {new * 1000:>10.1f}ms {old / new:>7.1f}x {size / new / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    run()
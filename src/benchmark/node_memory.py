@@ -0,0 +1,96 @@
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+import delimiter
+from benchmark.corpus import generate_corpus
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+# Subclasses whose class attributes shadow the slots, so every attribute lands
+# in a per-instance __dict__ the way it did before the classes had __slots__.
+# The unused slots still take 8 bytes each, which run() subtracts again.
+class DictTextNode(TextNode):
+    text = text_type = url = None
+
+
+class DictLeafNode(LeafNode):
+    tag = value = children = props = None
+
+
+class DictParentNode(ParentNode):
+    tag = value = children = props = None
+
+
+VARIANTS = {
+    "slots": (TextNode, LeafNode, ParentNode),
+    "dict": (DictTextNode, DictLeafNode, DictParentNode),
+}
+
+
+def bytes_per_node(make, count=100000):
+    # Measure the memory one node costs, including its instance dict if any
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [make(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    list_size = sys.getsizeof(nodes)
+    return (after - before - list_size) / count
+
+
+def memory_status():
+    # Return (current, peak) resident memory in KB for this process
+    # ru_maxrss survives fork+exec on Linux, so a child started from a big
+    # parent would report the parent's peak; /proc's VmHWM starts afresh
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["VmRSS"].split()[0]), int(fields["VmHWM"].split()[0])
+    except (OSError, KeyError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak, peak
+
+
+def parse_corpus(variant, scale):
+    # Parse a corpus with the given node classes, keeping every tree alive,
+    # and report how far resident memory grew over what the process held
+    # before parsing
+    delimiter.TextNode, delimiter.LeafNode, delimiter.ParentNode = VARIANTS[variant]
+    pages = generate_corpus("blog", scale)
+    start_kb = memory_status()[0]
+    trees = [delimiter.markdown_to_html_node(markdown) for path, markdown in pages]
+    peak_kb = memory_status()[1]
+    print(f"{peak_kb - start_kb} {len(trees)}")
+
+
+def run(scale=1.0):
+    print(f"{'node':<12} {'__dict__':>10} {'__slots__':>10}")
+    text = "shared text"
+    makers = {
+        "TextNode": lambda cls: lambda i: cls(text, TextType.LINK, text),
+        "LeafNode": lambda cls: lambda i: cls("a", text, None),
+        "ParentNode": lambda cls: lambda i: cls("p", None),
+    }
+    slot_counts = {"TextNode": 3, "LeafNode": 4, "ParentNode": 4}
+    for index, (name, maker) in enumerate(makers.items()):
+        slotted = bytes_per_node(maker(VARIANTS["slots"][index]))
+        with_dict = bytes_per_node(maker(VARIANTS["dict"][index])) - 8 * slot_counts[name]
+        print(f"{name:<12} {with_dict:>8.0f} B {slotted:>8.0f} B")
+
+    print(f"Peak RSS growth parsing the blog corpus at scale {scale}, every tree kept alive:")
+    for variant in ("dict", "slots"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmark.node_memory", "--child", variant, str(scale)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        print(f"  {variant:<6} {int(output[0]) / 1024:>8.1f} MB for {output[1]} pages")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        parse_corpus(sys.argv[2], float(sys.argv[3]))
+    else:
+        run(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
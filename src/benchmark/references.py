@@ -0,0 +1,76 @@
+import random
+import re
+import time
+
+from delimiter import extract_markdown_images, extract_markdown_links, markdown_to_html_node
+
+
+def make_page(rng, paragraphs, words, targets, reference_style):
+    # Build a link-heavy page that links to the same few long URLs over and
+    # over, either inline or through reference definitions
+    urls = [f"https://docs.example.com/reference/v2/section-{i}/topic-{i * 7}.html" for i in range(targets)]
+    blocks = []
+    for p in range(paragraphs):
+        parts = []
+        for i in range(words):
+            if rng.random() < 0.3:
+                target = rng.randrange(targets)
+                if reference_style:
+                    parts.append(f"[link {i}][topic {target}]")
+                else:
+                    parts.append(f"[link {i}]({urls[target]})")
+            else:
+                parts.append(f"word{i}")
+        blocks.append(" ".join(parts))
+    if reference_style:
+        blocks.append("\n".join(f"[topic {i}]: {urls[i]}" for i in range(targets)))
+    return "\n\n".join(blocks)
+
+
+def extract_recompiled(text):
+    # extract_markdown_images and extract_markdown_links as they were, passing the pattern source on each call
+    images = re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    links = re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return images, links
+
+
+def extract_precompiled(text):
+    return extract_markdown_images(text), extract_markdown_links(text)
+
+
+def best_of(func, items, repeat):
+    # Return the fastest of several timed runs over all items
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(repeat=5):
+    rng = random.Random(42)
+    inline_pages = [make_page(rng, 20, 80, 12, False) for _ in range(50)]
+    rng = random.Random(42)
+    reference_pages = [make_page(rng, 20, 80, 12, True) for _ in range(50)]
+    for inline, reference in zip(inline_pages, reference_pages):
+        if markdown_to_html_node(inline).to_html() != markdown_to_html_node(reference).to_html():
+            raise AssertionError("Reference-style pages render differently from inline ones")
+
+    print(f"{'case':<28} {'time':>10} {'size':>10} {'MB/s':>8}")
+    cases = [
+        ("parse inline links", markdown_to_html_node, inline_pages),
+        ("parse reference links", markdown_to_html_node, reference_pages),
+        ("extract, pattern per call", extract_recompiled, inline_pages),
+        ("extract, precompiled", extract_precompiled, inline_pages),
+    ]
+    for name, func, pages in cases:
+        size = sum(len(page) for page in pages)
+        seconds = best_of(func, pages, repeat)
+        print(f"{name:<28} {seconds * 1000:>8.1f}ms {size / 1e6:>8.2f}MB {size / seconds / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    run()
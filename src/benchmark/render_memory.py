@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from htmlnode import LeafNode, ParentNode
+from textnode import TextNode, TextType
+
+
+def make_document(target_bytes):
+    # Build a nested node tree whose HTML is roughly target_bytes long
+    sentence = "The quick brown fox jumps over the lazy dog. " * 4
+    paragraph = [
+        TextNode(sentence, TextType.TEXT),
+        TextNode("bold words", TextType.BOLD),
+        TextNode(sentence, TextType.TEXT),
+        TextNode("a link", TextType.LINK, "https://example.com/some/page.html"),
+    ]
+    paragraph_size = len(ParentNode("p", paragraph).to_html())
+    sections = []
+    size = 0
+    while size < target_bytes:
+        items = [ParentNode("li", [ParentNode("p", paragraph)]) for _ in range(20)]
+        section = ParentNode("section", [
+            ParentNode("h2", [LeafNode(None, "Section")]),
+            ParentNode("div", [ParentNode("ul", items)]),
+            ParentNode("blockquote", [ParentNode("p", paragraph)]),
+        ])
+        sections.append(section)
+        size += paragraph_size * 21
+    return ParentNode("div", [ParentNode("article", sections)])
+
+
+def concatenate_html(node):
+    # The old ParentNode.to_html: each level copies its children into a fresh string
+    if not isinstance(node, ParentNode):
+        return node.to_html()
+    children_html = ""
+    for child in node.children:
+        children_html += concatenate_html(child)
+    return f"<{node.tag}{node.props_to_html()}>{children_html}</{node.tag}>"
+
+
+def measure(label, func, document, path):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    func(document, path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    size = os.path.getsize(path)
+    print(f"{label:<28} {elapsed:>7.2f}s  peak {peak / 1e6:>8.1f} MB  ({peak / size:.2f}x output)")
+    return size
+
+
+def write_concatenated(document, path):
+    with open(path, "w") as f:
+        f.write(concatenate_html(document))
+
+
+def write_to_html(document, path):
+    with open(path, "w") as f:
+        f.write(document.to_html())
+
+
+def write_streamed(document, path):
+    with open(path, "w") as f:
+        document.render_to(f)
+
+
+def run(megabytes=50):
+    document = make_document(megabytes * 1000 * 1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "out.html")
+        print(f"Rendering a ~{megabytes} MB document")
+        measure("string concatenation (old)", write_concatenated, document, path)
+        measure("to_html + write", write_to_html, document, path)
+        size = measure("render_to(fp)", write_streamed, document, path)
+        print(f"Output size {size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,108 @@
+import contextlib
+import io
+import os
+import shutil
+import time
+
+from delimiter import (
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html,
+    markdown_to_html_node,
+    text_to_textnodes,
+)
+from sync import sync_files
+from template import compile_template
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet"></head>
+<body><article>{{ Content }}</article></body>
+</html>
+"""
+
+
+def best_time(func, repeat):
+    # Return the fastest of several runs of func
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def inline_inputs(block, block_type):
+    # The strings markdown_to_html_node hands to the inline parser for a block
+    if block_type == "heading":
+        level = block.count("#")
+        return [block[level:].strip()]
+    if block_type == "quote":
+        return [block[1:].strip()]
+    if block_type == "unordered list":
+        return [line[2:] for line in block.splitlines()]
+    if block_type == "ordered list":
+        return [line[line.index('.') + 2:] for line in block.splitlines()]
+    if block_type == "paragraph":
+        return [block]
+    return []
+
+
+def run_page_stages(pages, work_dir, repeat):
+    # Time every stage of page generation separately over a corpus
+    markdowns = [markdown for path, markdown in pages]
+    blocks = [block for markdown in markdowns for block in markdown_to_blocks(markdown)]
+    types = [block_to_block_type(block) for block in blocks]
+    texts = [text for block, block_type in zip(blocks, types) for text in inline_inputs(block, block_type)]
+    trees = [markdown_to_html_node(markdown) for markdown in markdowns]
+    bodies = [tree.to_html() for tree in trees]
+    template = compile_template(TEMPLATE)
+    out_dir = os.path.join(work_dir, "out")
+
+    def write_pages():
+        for (path, markdown), body in zip(pages, bodies):
+            dest_path = os.path.join(out_dir, path.replace(".md", ".html"))
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, "w") as d:
+                d.write(body)
+
+    def read_pages():
+        for path, markdown in pages:
+            with open(os.path.join(out_dir, path.replace(".md", ".html"))) as f:
+                f.read()
+
+    results = {
+        "markdown_to_blocks": best_time(lambda: [markdown_to_blocks(m) for m in markdowns], repeat),
+        "block_to_block_type": best_time(lambda: [block_to_block_type(b) for b in blocks], repeat),
+        "text_to_textnodes": best_time(lambda: [text_to_textnodes(t) for t in texts], repeat),
+        "markdown_to_html_node": best_time(lambda: [markdown_to_html_node(m) for m in markdowns], repeat),
+        "to_html": best_time(lambda: [tree.to_html() for tree in trees], repeat),
+        "markdown_to_html": best_time(lambda: [markdown_to_html(m) for m in markdowns], repeat),
+        "template fill": best_time(
+            lambda: [template.render({"Title": "Title", "Content": body}) for body in bodies], repeat
+        ),
+        "disk write": best_time(write_pages, repeat),
+        "disk read": best_time(read_pages, repeat),
+    }
+    shutil.rmtree(out_dir, ignore_errors=True)
+    return results
+
+
+def run_copy_stage(static_dir, work_dir, repeat):
+    # Time copy_files into an empty destination and then an unchanged one
+    dest_dir = os.path.join(work_dir, "public")
+
+    def full_copy():
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync_files(static_dir, dest_dir)
+
+    def unchanged_sync():
+        with contextlib.redirect_stdout(io.StringIO()):
+            sync_files(static_dir, dest_dir)
+
+    results = {"copy_files": best_time(full_copy, repeat)}
+    results["copy_files unchanged"] = best_time(unchanged_sync, repeat)
+    shutil.rmtree(dest_dir, ignore_errors=True)
+    return results
@@ -0,0 +1,71 @@
+import hashlib
+import os
+
+from delimiter import PARSER_VERSION
+
+
+class ParseCache:
+    # Content-addressed cache of rendered page bodies on disk
+    # Entries are keyed by the markdown and the parser version, and a hit
+    # refreshes the entry's mtime so eviction drops the least recently used
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, markdown, salt=""):
+        # salt covers build options that change the rendered body
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}\0{salt}\0".encode())
+        digest.update(markdown.encode())
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key[2:] + ".html")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "r") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return body
+
+    def put(self, key, body):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        # Remove the least recently used entries until the cache fits in max_bytes
+        # Returns the number of entries removed
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+        removed = 0
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def __repr__(self):
+        return f"ParseCache({self.directory}, {self.max_bytes})"
@@ -0,0 +1,149 @@
+import gzip
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from discovery import walk_files
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt")
+
+
+def gzip_bytes(data):
+    # mtime=0 keeps the output identical across builds
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def zstd_bytes(data):
+    return zstd.compress(data, level=19)
+
+
+def encoders():
+    # Return the (suffix, function) pairs this interpreter supports
+    found = [(".gz", gzip_bytes)]
+    if zstd is not None:
+        found.append((".zst", zstd_bytes))
+    return found
+
+
+def sibling_is_fresh(path, sibling_path):
+    # A sibling is stamped with its source's mtime when written, and outputs
+    # keep their mtime while their bytes do not change
+    try:
+        return os.stat(sibling_path).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(path):
+    # Write compressed siblings of one file, skipping ones that are up to date
+    # A sibling that would not be smaller than the file is removed instead
+    # Returns the number of siblings written and the paths of those it has
+    stat = os.stat(path)
+    data = None
+    written = 0
+    kept = []
+    for suffix, encode in encoders():
+        sibling_path = path + suffix
+        if sibling_is_fresh(path, sibling_path):
+            kept.append(sibling_path)
+            continue
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+        compressed = encode(data)
+        if len(compressed) >= len(data):
+            if os.path.exists(sibling_path):
+                os.remove(sibling_path)
+            continue
+        tmp_path = f"{sibling_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, sibling_path)
+        written += 1
+        kept.append(sibling_path)
+    return written, kept
+
+
+def remove_siblings(paths):
+    # Remove compressed siblings, returning how many there were
+    removed = 0
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def compress_changed(paths, min_size=1024, manifest=None):
+    # Refresh the compressed siblings of just the given outputs, for watch
+    # mode, removing those of outputs that are gone or now too small
+    # With a manifest, only siblings it records are removed, and the record
+    # is kept up to date
+    compressed = set(manifest.get("compressed", ())) if manifest is not None else None
+    written = removed = 0
+    for path in paths:
+        if not path.endswith(COMPRESSIBLE_EXTENSIONS):
+            continue
+        kept = []
+        if os.path.exists(path) and os.path.getsize(path) >= min_size:
+            count, kept = compress_file(path)
+            written += count
+        for suffix in (".gz", ".zst"):
+            sibling_path = path + suffix
+            if sibling_path in kept:
+                if compressed is not None:
+                    compressed.add(sibling_path)
+            elif compressed is None:
+                removed += remove_siblings([sibling_path])
+            elif sibling_path in compressed:
+                compressed.discard(sibling_path)
+                removed += remove_siblings([sibling_path])
+    if manifest is not None:
+        manifest["compressed"] = sorted(compressed)
+    return {"files": len(paths), "written": written, "removed": removed}
+
+
+def remove_compressed(manifest):
+    # Remove every sibling the manifest says was written, for builds with
+    # compression turned off; returns how many were removed
+    return remove_siblings(manifest.pop("compressed", ()))
+
+
+def compress_outputs(dest_dir_path, min_size=1024, jobs=1, manifest=None):
+    # Write .gz (and .zst when available) siblings for compressible outputs of
+    # at least min_size bytes
+    # With a manifest, the siblings written are recorded in it, and recorded
+    # siblings that were not written again, because their output is gone or
+    # too small, are removed; .gz and .zst files this stage did not write,
+    # like ones copied from static/, are never touched
+    start = time.perf_counter()
+    paths = []
+    for relative_path, entry in walk_files(dest_dir_path):
+        path = entry.path
+        if path.endswith(COMPRESSIBLE_EXTENSIONS) and entry.stat().st_size >= min_size:
+            paths.append(path)
+
+    if jobs > 1 and len(paths) > 1:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(compress_file, paths, chunksize=chunksize))
+    else:
+        results = [compress_file(path) for path in paths]
+    written = sum(count for count, kept in results)
+    removed = 0
+    if manifest is not None:
+        compressed = sorted(sibling for count, kept in results for sibling in kept)
+        removed = remove_siblings(set(manifest.get("compressed", ())).difference(compressed))
+        manifest["compressed"] = compressed
+    elapsed = time.perf_counter() - start
+    print(
+        f"Compressed: {written} written for {len(paths)} files, "
+        f"{removed} removed in {elapsed:.2f}s"
+    )
+    return {"files": len(paths), "written": written, "removed": removed}
@@ -1,6 +1,42 @@
 import re
 from textnode import TextNode, TextType
-from htmlnode import LeafNode, ParentNode, HTMLNode
+from htmlnode import LeafNode, ParentNode, HTMLNode, escape_text
+from tracing import span
+
+# Bump whenever a change to parsing or rendering changes the HTML for the same
+# markdown, so cached page bodies from older versions are not reused
+PARSER_VERSION = "6"
+
+# While markdown_to_html_node collects links and text, text_to_textnodes
+# appends the (source, url) of every link and image it produces, and the
+# text of every node, here
+link_sink = None
+text_sink = None
+# The {label: url} reference definitions of the document being converted
+reference_table = None
+
+# A "[label]: url" line, with an optional title that is not used
+REFERENCE_DEFINITION_PATTERN = re.compile(
+    r"[ ]{0,3}\[([^\[\]]*\S[^\[\]]*)\]:[ \t]*<?([^\s<>]+)>?"
+    r"(?:[ \t]+(?:\"[^\"]*\"|'[^']*'|\([^()]*\)))?[ \t]*"
+)
+
+
+def reference_label(label):
+    # Labels match case-insensitively and with any run of whitespace as one space
+    return " ".join(label.split()).casefold()
+
+
+def is_reference_block(lines):
+    return all(REFERENCE_DEFINITION_PATTERN.fullmatch(line) for line in lines)
+
+
+def add_references(block, references):
+    # Record the definitions of a reference block; the first definition of a label wins
+    for line in block.splitlines():
+        match = REFERENCE_DEFINITION_PATTERN.fullmatch(line)
+        references.setdefault(reference_label(match.group(1)), match.group(2))
+
 
 def block_to_block_type(block):
     # Find the type of block and return it as a string
@@ -31,10 +67,218 @@ def block_to_block_type(block):
                 return "paragraph"
         return "ordered list"
 
+    if block.startswith("[") and is_reference_block(lines):
+        return "reference"
+
     return "paragraph"
 
+INLINE_SPECIAL_PATTERN = re.compile(r"[*`!\[]")
+# Images and links never reach across a bold, italic or code delimiter
+INLINE_IMAGE_PATTERN = re.compile(r"!\[([^\[\]*`]*)\]\(([^\(\)*`]*)\)")
+INLINE_LINK_PATTERN = re.compile(r"\[([^\[\]*`]*)\]\(([^\(\)*`]*)\)")
+# [text][label], [label][] and [label], only used when the label is defined
+REFERENCE_IMAGE_PATTERN = re.compile(r"!\[([^\[\]*`]*)\](?:\[([^\[\]*`]*)\])?")
+REFERENCE_LINK_PATTERN = re.compile(r"\[([^\[\]*`]*)\](?:\[([^\[\]*`]*)\])?")
+MARKDOWN_IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+MARKDOWN_LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
+
+def resolve_reference(pattern, text, i):
+    # Match a reference-style image or link at text[i] against reference_table
+    # Returns (match, url), or None when there is no match or no such label
+    # Labels are looked up as written first; a normalized hit is stored under
+    # the written form too, so each spelling is normalized once per document
+    match = pattern.match(text, i)
+    if match is None:
+        return None
+    label = match.group(2) or match.group(1)
+    url = reference_table.get(label)
+    if url is None:
+        url = reference_table.get(reference_label(label))
+        if url is None:
+            return None
+        reference_table[label] = url
+    return match, url
+
+
 def text_to_textnodes(text):
-    # Split the text into text nodes based on markdown delimiters
+    # Split the text into text nodes in a single left-to-right scan
+    # Gives the same nodes as text_to_textnodes_multipass: bold, italic and
+    # code take precedence in that order, and images and links are only
+    # recognised in the plain text between them
+
+    nodes = []
+    length = len(text)
+    start = 0
+    i = 0
+    while i < length:
+        match = INLINE_SPECIAL_PATTERN.search(text, i)
+        if match is None:
+            break
+        i = match.start()
+        char = text[i]
+
+        if char == "*":
+            if text.startswith("**", i):
+                close = text.find("**", i + 2)
+                if close == -1:
+                    raise ValueError("Invalid markdown, formatted section not closed")
+                inner_start, end, text_type = i + 2, close + 2, TextType.BOLD
+            else:
+                close = text.find("*", i + 1)
+                if close == -1 or text.startswith("**", close):
+                    raise ValueError("Invalid markdown, formatted section not closed")
+                inner_start, end, text_type = i + 1, close + 1, TextType.ITALIC
+            if i > start:
+                nodes.append(TextNode(text[start:i], TextType.TEXT))
+            if close > inner_start:
+                nodes.append(TextNode(text[inner_start:close], text_type))
+            i = start = end
+            continue
+
+        if char == "`":
+            close = text.find("`", i + 1)
+            if close == -1 or text.find("*", i + 1, close) != -1:
+                raise ValueError("Invalid markdown, formatted section not closed")
+            if i > start:
+                nodes.append(TextNode(text[start:i], TextType.TEXT))
+            if close > i + 1:
+                nodes.append(TextNode(text[i + 1:close], TextType.CODE))
+            i = start = close + 1
+            continue
+
+        if char == "!":
+            span = INLINE_IMAGE_PATTERN.match(text, i)
+            reference_pattern = REFERENCE_IMAGE_PATTERN
+            text_type = TextType.IMAGE
+        elif i > 0 and text[i - 1] == "!":
+            span = None
+            reference_pattern = None
+        else:
+            span = INLINE_LINK_PATTERN.match(text, i)
+            reference_pattern = REFERENCE_LINK_PATTERN
+            text_type = TextType.LINK
+        if span is not None:
+            url = source = span.group(2)
+        elif reference_table and reference_pattern is not None:
+            resolved = resolve_reference(reference_pattern, text, i)
+            if resolved is None:
+                i += 1
+                continue
+            span, url = resolved
+            source = span.group(0)
+        else:
+            i += 1
+            continue
+        if i > start:
+            nodes.append(TextNode(text[start:i], TextType.TEXT))
+        nodes.append(TextNode(span.group(1), text_type, url))
+        if link_sink is not None:
+            link_sink.append((source, url))
+        i = start = span.end()
+
+    if start < length:
+        nodes.append(TextNode(text[start:], TextType.TEXT))
+    if text_sink is not None:
+        text_sink.extend([node.text for node in nodes])
+    return nodes
+
+
+def text_to_html(text):
+    # Render inline markdown straight to HTML in the same scan as
+    # text_to_textnodes, without building text nodes for plain, bold,
+    # italic or code text
+    # Gives the HTML of the nodes text_to_textnodes returns, joined
+
+    out = []
+    texts = [] if text_sink is not None else None
+    length = len(text)
+    start = 0
+    i = 0
+    while i < length:
+        match = INLINE_SPECIAL_PATTERN.search(text, i)
+        if match is None:
+            break
+        i = match.start()
+        char = text[i]
+
+        if char == "*" or char == "`":
+            if char == "`":
+                close = text.find("`", i + 1)
+                if close == -1 or text.find("*", i + 1, close) != -1:
+                    raise ValueError("Invalid markdown, formatted section not closed")
+                inner_start, end, tag = i + 1, close + 1, "code"
+            elif text.startswith("**", i):
+                close = text.find("**", i + 2)
+                if close == -1:
+                    raise ValueError("Invalid markdown, formatted section not closed")
+                inner_start, end, tag = i + 2, close + 2, "b"
+            else:
+                close = text.find("*", i + 1)
+                if close == -1 or text.startswith("**", close):
+                    raise ValueError("Invalid markdown, formatted section not closed")
+                inner_start, end, tag = i + 1, close + 1, "i"
+            if i > start:
+                plain = text[start:i]
+                out.append(escape_text(plain))
+                if texts is not None:
+                    texts.append(plain)
+            if close > inner_start:
+                inner = text[inner_start:close]
+                out.append(f"<{tag}>{escape_text(inner)}</{tag}>")
+                if texts is not None:
+                    texts.append(inner)
+            i = start = end
+            continue
+
+        if char == "!":
+            span = INLINE_IMAGE_PATTERN.match(text, i)
+            reference_pattern = REFERENCE_IMAGE_PATTERN
+            text_type = TextType.IMAGE
+        elif i > 0 and text[i - 1] == "!":
+            span = None
+            reference_pattern = None
+        else:
+            span = INLINE_LINK_PATTERN.match(text, i)
+            reference_pattern = REFERENCE_LINK_PATTERN
+            text_type = TextType.LINK
+        if span is not None:
+            url = source = span.group(2)
+        elif reference_table and reference_pattern is not None:
+            resolved = resolve_reference(reference_pattern, text, i)
+            if resolved is None:
+                i += 1
+                continue
+            span, url = resolved
+            source = span.group(0)
+        else:
+            i += 1
+            continue
+        if i > start:
+            plain = text[start:i]
+            out.append(escape_text(plain))
+            if texts is not None:
+                texts.append(plain)
+        # Links and images go through TextNode for their asset and image attributes
+        out.append(TextNode(span.group(1), text_type, url).to_html())
+        if texts is not None:
+            texts.append(span.group(1))
+        if link_sink is not None:
+            link_sink.append((source, url))
+        i = start = span.end()
+
+    if start < length:
+        plain = text[start:]
+        out.append(escape_text(plain))
+        if texts is not None:
+            texts.append(plain)
+    if texts is not None:
+        text_sink.extend(texts)
+    return "".join(out)
+
+
+def text_to_textnodes_multipass(text):
+    # Split the text into text nodes with one pass per kind of markdown delimiter
 
     nodes = [TextNode(text, TextType.TEXT)]
     nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
@@ -70,17 +314,13 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 def extract_markdown_images(text):
     # Extract the images from the text and return them as a list of tuples
 
-    pattern = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return MARKDOWN_IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
     # Extract the links from the text and return them as a list of tuples
 
-    pattern = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    matches = re.findall(pattern, text)
-    return matches
+    return MARKDOWN_LINK_PATTERN.findall(text)
 
 def split_nodes_image(old_nodes):
     # Split the text nodes based on the image markdown and return the new nodes
@@ -151,36 +391,235 @@ def markdown_to_blocks(markdown):
         filtered_blocks.append(block)
     return filtered_blocks
 
-def markdown_to_html_node(markdown):
+# Line breaks str.splitlines knows besides "\n"; blocks holding any of them
+# are classified from a copy so they behave exactly like block_to_block_type
+OTHER_LINE_BREAKS = "\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+OTHER_LINE_BREAKS_PATTERN = re.compile(f"[{OTHER_LINE_BREAKS}]")
+NON_SPACE_PATTERN = re.compile(r"\S")
+
+
+def split_block_spans(markdown):
+    # Find the blocks markdown_to_blocks would return, as (start, end) offsets
+    # into markdown instead of stripped copies
+    spans = []
+    length = len(markdown)
+    position = 0
+    while position <= length:
+        separator = markdown.find("\n\n", position)
+        if separator == -1:
+            separator = length
+        if separator > position:
+            start = position
+            if markdown[start].isspace():
+                match = NON_SPACE_PATTERN.search(markdown, position, separator)
+                start = separator if match is None else match.start()
+            end = separator
+            while end > start and markdown[end - 1].isspace():
+                end -= 1
+            if start == end:
+                start = end = position
+            spans.append((start, end))
+        position = separator + 2
+    return spans
+
+
+def iter_line_spans(markdown, start, end):
+    # Yield (start, end) offsets of the lines between start and end
+    while True:
+        newline = markdown.find("\n", start, end)
+        if newline == -1:
+            yield start, end
+            return
+        yield start, newline
+        start = newline + 1
+
+
+def has_other_line_breaks(markdown):
+    # Check the whole document once so clean documents skip the per-block check
+    return any(char in markdown for char in OTHER_LINE_BREAKS)
+
+
+def span_block_type(markdown, start, end, other_breaks=True):
+    # Classify the block markdown[start:end] like block_to_block_type, without copying it
+    # Checks that apply to every line count line starts instead of visiting each line
+    # Pass other_breaks=False when has_other_line_breaks(markdown) is false
+    if start == end or (other_breaks and OTHER_LINE_BREAKS_PATTERN.search(markdown, start, end)):
+        return block_to_block_type(markdown[start:end])
+
+    first = markdown[start]
+    if first == "#":
+        first_end = markdown.find("\n", start, end)
+        if first_end == -1:
+            first_end = end
+        heading_level = 0
+        while heading_level < 6 and start + heading_level < first_end and markdown[start + heading_level] == "#":
+            heading_level += 1
+        if start + heading_level < first_end and markdown[start + heading_level] == " ":
+            return "heading"
+
+    if first == "`" and markdown.startswith("```", start, end) and markdown.endswith("```", start, end):
+        return "code"
+
+    if first == ">" or first == "-" or first == "*" or first == "1":
+        newlines = markdown.count("\n", start, end)
+        if first == ">" and markdown.count("\n>", start, end) == newlines:
+            return "quote"
+        if markdown.startswith("- ", start, end) or markdown.startswith("* ", start, end):
+            if markdown.count("\n- ", start, end) + markdown.count("\n* ", start, end) == newlines:
+                return "unordered list"
+        if markdown.startswith("1. ", start, end):
+            lines = markdown[start:end].split("\n")
+            for i in range(len(lines)):
+                if not lines[i].strip().startswith(f"{i + 1}. "):
+                    return "paragraph"
+            return "ordered list"
+
+    if first == "[":
+        lines = markdown[start:end].split("\n")
+        if is_reference_block(lines):
+            return "reference"
+
+    return "paragraph"
+
+
+def lex_blocks(markdown):
+    # Split markdown into classified blocks as (start, end, block_type) offsets
+    other_breaks = has_other_line_breaks(markdown)
+    return [
+        (start, end, span_block_type(markdown, start, end, other_breaks))
+        for start, end in split_block_spans(markdown)
+    ]
+
+
+def markdown_to_html_node(markdown, links=None, texts=None, references=None):
     # Convert markdown to an HTML node
+    # With a links list, [line, url] is appended to it for every link and image
+    # With a texts list, the text of every inline node is appended to it
+    # Reference-style links resolve against the document's own definitions,
+    # or against a references table collected beforehand when one is given
+    return ParentNode("div", convert_blocks(markdown, span_to_html_node, links, texts, references))
 
-    blocks = markdown_to_blocks(markdown)
-    nodes = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == "heading":
-            level = block.count("#")
-            content = block[level:].strip()
-            nodes.append(ParentNode(f"h{level}", text_to_textnodes(content)))
-        elif block_type == "code":
-            code_content = block[3:-3].strip()
-            code_node = LeafNode("code", code_content)
-            pre_node = ParentNode("pre", [code_node])
-            nodes.append(pre_node)
-        elif block_type == "quote":
-            quote_content = block[1:].strip()
-            nodes.append(ParentNode("blockquote", text_to_textnodes(quote_content)))
-        elif block_type == "unordered list":
-            lines = block.splitlines()
-            children = [ParentNode("li", text_to_textnodes(line[2:])) for line in lines]
-            nodes.append(ParentNode("ul", children))
-        elif block_type == "ordered list":
-            lines = block.splitlines()
-            children = []
-            for line in lines:
-                line_content = line[line.index('.') + 2:]
-                children.append(ParentNode("li", text_to_textnodes(line_content)))
-            nodes.append(ParentNode("ol", children))
-        elif block_type == "paragraph":
-            nodes.append(ParentNode("p", text_to_textnodes(block)))
-    return ParentNode("div", nodes)
+
+def markdown_to_html(markdown, links=None, texts=None, references=None):
+    # Convert markdown straight to an HTML string, skipping the node tree
+    # Gives markdown_to_html_node(markdown).to_html() and collects the same
+    # links and texts
+    return "<div>" + "".join(convert_blocks(markdown, span_to_html, links, texts, references)) + "</div>"
+
+
+def convert_blocks(markdown, convert, links=None, texts=None, references=None):
+    # Split and classify the blocks of markdown, then return what
+    # convert(markdown, start, end, block_type) gives for each block that has output
+    global link_sink, text_sink, reference_table
+
+    with span("block split"):
+        spans = split_block_spans(markdown)
+    with span("block classify"):
+        other_breaks = has_other_line_breaks(markdown)
+        block_types = [span_block_type(markdown, start, end, other_breaks) for start, end in spans]
+        if references is None:
+            references = {}
+            for (start, end), block_type in zip(spans, block_types):
+                if block_type == "reference":
+                    add_references(markdown[start:end], references)
+    with span("inline parse"):
+        converted = []
+        reference_table = references
+        if links is None and texts is None:
+            try:
+                for (start, end), block_type in zip(spans, block_types):
+                    block = convert(markdown, start, end, block_type)
+                    if block is not None:
+                        converted.append(block)
+            finally:
+                reference_table = None
+            return converted
+
+        link_sink = []
+        text_sink = texts
+        line = 1
+        line_start = 0
+        try:
+            for (start, end), block_type in zip(spans, block_types):
+                block = convert(markdown, start, end, block_type)
+                if block is not None:
+                    converted.append(block)
+                # Find each link in the block source to report its exact line
+                position = start
+                if links is not None:
+                    for source, url in link_sink:
+                        found = markdown.find(source, position, end)
+                        if found == -1:
+                            found = position
+                        line += markdown.count("\n", line_start, found)
+                        line_start = position = found
+                        links.append([line, url])
+                link_sink.clear()
+        finally:
+            link_sink = None
+            text_sink = None
+            reference_table = None
+    return converted
+
+
+def span_to_html_node(markdown, start, end, block_type):
+    # Convert the block markdown[start:end] to an HTML node
+    # The block is only copied out of the document here, when it is converted
+    return block_to_html_node(markdown[start:end], block_type)
+
+
+def block_to_html_node(block, block_type):
+    # Convert one classified block to an HTML node
+    if block_type == "heading":
+        level = block.count("#")
+        content = block[level:].strip()
+        return ParentNode(f"h{level}", text_to_textnodes(content))
+    elif block_type == "code":
+        code_content = block[3:-3].strip()
+        code_node = LeafNode("code", code_content)
+        return ParentNode("pre", [code_node])
+    elif block_type == "quote":
+        quote_content = block[1:].strip()
+        return ParentNode("blockquote", text_to_textnodes(quote_content))
+    elif block_type == "unordered list":
+        lines = block.splitlines()
+        children = [ParentNode("li", text_to_textnodes(line[2:])) for line in lines]
+        return ParentNode("ul", children)
+    elif block_type == "ordered list":
+        lines = block.splitlines()
+        children = []
+        for line in lines:
+            line_content = line[line.index('.') + 2:]
+            children.append(ParentNode("li", text_to_textnodes(line_content)))
+        return ParentNode("ol", children)
+    elif block_type == "paragraph":
+        return ParentNode("p", text_to_textnodes(block))
+    # Reference definitions produce no output
+    return None
+
+
+def span_to_html(markdown, start, end, block_type):
+    return block_to_html(markdown[start:end], block_type)
+
+
+def block_to_html(block, block_type):
+    # Convert one classified block straight to HTML, like block_to_html_node(...).to_html()
+    if block_type == "heading":
+        level = block.count("#")
+        return f"<h{level}>{text_to_html(block[level:].strip())}</h{level}>"
+    elif block_type == "code":
+        return f"<pre><code>{escape_text(block[3:-3].strip())}</code></pre>"
+    elif block_type == "quote":
+        return f"<blockquote>{text_to_html(block[1:].strip())}</blockquote>"
+    elif block_type == "unordered list":
+        items = "".join(f"<li>{text_to_html(line[2:])}</li>" for line in block.splitlines())
+        return f"<ul>{items}</ul>"
+    elif block_type == "ordered list":
+        items = "".join(
+            f"<li>{text_to_html(line[line.index('.') + 2:])}</li>" for line in block.splitlines()
+        )
+        return f"<ol>{items}</ol>"
+    elif block_type == "paragraph":
+        return f"<p>{text_to_html(block)}</p>"
+    # Reference definitions produce no output
+    return None
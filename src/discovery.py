@@ -0,0 +1,73 @@
+import os
+import time
+
+# Directories never walked into; pruned before they are listed
+IGNORED_DIRS = {".git", ".hg", ".svn"}
+# Listings of directories modified this recently are not trusted on the next
+# build, since another change within the same mtime tick would go unnoticed
+RACY_WINDOW_NS = 2 * 10**9
+
+
+def walk_files(root, suffix=None, relative=""):
+    # Yield (relative_path, DirEntry) for every file under root, skipping
+    # ignored directories without listing them
+    # Relative paths are built up while descending instead of with relpath,
+    # and the DirEntry keeps the stat data scandir already fetched
+    try:
+        entries = os.scandir(os.path.join(root, relative) if relative else root)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    subdirs = []
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in IGNORED_DIRS:
+                    subdirs.append(entry.name)
+            elif entry.is_file() and (suffix is None or entry.name.endswith(suffix)):
+                yield os.path.join(relative, entry.name), entry
+    for name in subdirs:
+        yield from walk_files(root, suffix, os.path.join(relative, name))
+
+
+def scan_tree(root, previous=None):
+    # Snapshot the directories under root as {relative_dir: [mtime_ns, files, subdirs]}
+    # A directory whose mtime matches previous reuses its listing without
+    # scandir; its subdirectories are still checked, since changes inside
+    # them do not touch its mtime
+    previous = previous or {}
+    tree = {}
+    now = time.time_ns()
+    pending = [""]
+    while pending:
+        relative = pending.pop()
+        path = os.path.join(root, relative) if relative else root
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        known = previous.get(relative)
+        if known is not None and known[0] == mtime:
+            files, subdirs = known[1], known[2]
+        else:
+            files, subdirs = [], []
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in IGNORED_DIRS:
+                            subdirs.append(entry.name)
+                    elif entry.is_file():
+                        files.append(entry.name)
+            files.sort()
+            subdirs.sort()
+        trusted = now - mtime > RACY_WINDOW_NS
+        tree[relative] = [mtime if trusted else None, files, subdirs]
+        pending.extend(os.path.join(relative, name) for name in reversed(subdirs))
+    return tree
+
+
+def tree_files(tree, suffix=None):
+    # Yield the relative path of every file in a scan_tree snapshot
+    for relative in sorted(tree):
+        for name in tree[relative][1]:
+            if suffix is None or name.endswith(suffix):
+                yield os.path.join(relative, name)
@@ -1,5 +1,23 @@
+def escape_text(text):
+    # Escape text content for HTML
+    # Most strings hold no special characters; checking for each with "in" is
+    # a fast scan, and such strings come back as they are without a copy
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attribute(value):
+    # Escape a double-quoted attribute value, with the same fast path as escape_text
+    if "&" not in value and "<" not in value and ">" not in value and '"' not in value:
+        return value
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
 class HTMLNode:
     # Represents an HTML node
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -8,26 +26,54 @@ class HTMLNode:
 
     def to_html(self):
         if self.tag is None:
-            return self.value or ""
-        
-        attrs = ""
-        if self.props:
-            attrs = " ".join(f'{key}="{value}"' for key, value in self.props.items())
-            attrs = " " + attrs if attrs else ""
-        
+            return escape_text(self.value or "")
+
+        attrs = self.props_to_html()
+
         if self.children:
             children_html = "".join(child.to_html() for child in self.children)
             return f"<{self.tag}{attrs}>{children_html}</{self.tag}>"
         elif self.value:
-            return f"<{self.tag}{attrs}>{self.value}</{self.tag}>"
+            return f"<{self.tag}{attrs}>{escape_text(self.value)}</{self.tag}>"
         else:
             return f"<{self.tag}{attrs}></{self.tag}>"
+
+    def iter_html(self):
+        # Yield the HTML in chunks, in the same order to_html would join them
+        if self.tag is None or not self.children:
+            yield self.to_html()
+            return
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
+
+    def render_to(self, fp):
+        # Write the HTML to a file-like object without building it as one string
+        chunks = []
+        self.write_chunks(chunks, fp)
+        if chunks:
+            fp.write("".join(chunks))
+
+    def write_chunks(self, chunks, fp):
+        # Append this node's HTML to chunks, flushing them to fp once enough pile up
+        if self.tag is None or not self.children:
+            chunks.append(self.to_html())
+            return
+        chunks.append(f"<{self.tag}{self.props_to_html()}>")
+        for child in self.children:
+            child.write_chunks(chunks, fp)
+        chunks.append(f"</{self.tag}>")
+        if len(chunks) >= 1024:
+            fp.write("".join(chunks))
+            chunks.clear()
+
     def props_to_html(self):
         if self.props is None:
             return ""
         props_html = ""
         for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
+            props_html += f' {prop}="{escape_attribute(self.props[prop])}"'
         return props_html
 
     def __repr__(self):
@@ -46,6 +92,8 @@ class HTMLNode:
 
 class LeafNode(HTMLNode):
     # Represents a leaf node in the HTML tree
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
 
@@ -53,8 +101,14 @@ class LeafNode(HTMLNode):
         if self.value is None:
             raise ValueError("Invalid HTML: no value")
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return escape_text(self.value)
+        return f"<{self.tag}{self.props_to_html()}>{escape_text(self.value)}</{self.tag}>"
+
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_chunks(self, chunks, fp):
+        chunks.append(self.to_html())
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
@@ -70,6 +124,8 @@ class LeafNode(HTMLNode):
 
 class ParentNode(HTMLNode):
     # Represents a parent node in the HTML tree
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
@@ -78,11 +134,32 @@ class ParentNode(HTMLNode):
             raise ValueError("Invalid HTML: no tag")
         if self.children is None:
             raise ValueError("Invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
+        children_html = "".join([child.to_html() for child in self.children])
         return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
 
+    def iter_html(self):
+        if self.tag is None:
+            raise ValueError("Invalid HTML: no tag")
+        if self.children is None:
+            raise ValueError("Invalid HTML: no children")
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
+
+    def write_chunks(self, chunks, fp):
+        if self.tag is None:
+            raise ValueError("Invalid HTML: no tag")
+        if self.children is None:
+            raise ValueError("Invalid HTML: no children")
+        chunks.append(f"<{self.tag}{self.props_to_html()}>")
+        for child in self.children:
+            child.write_chunks(chunks, fp)
+        chunks.append(f"</{self.tag}>")
+        if len(chunks) >= 1024:
+            fp.write("".join(chunks))
+            chunks.clear()
+
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
 
@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import json
+import os
+import struct
+
+from assets import site_path, split_url
+from discovery import walk_files
+
+IMAGE_TYPES = {
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames
+JPEG_FRAME_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# Maps site paths like /images/a.png to {"width", "height"} and, for images
+# small enough to inline, "data"; None turns image attributes off, and
+# image_salt changes whenever the map does
+image_info = None
+image_salt = ""
+
+
+def set_image_info(info):
+    global image_info, image_salt
+    image_info = info
+    if info is not None:
+        image_salt = hashlib.sha256(json.dumps(info, sort_keys=True).encode()).hexdigest()[:16]
+    else:
+        image_salt = ""
+
+
+def jpeg_size(f):
+    # Walk the JPEG segments up to the first frame header
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H", header)[0]
+        if marker in JPEG_FRAME_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path):
+    # Read an image's (width, height) from its header, or None if unknown
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 " and len(head) >= 30:
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L" and len(head) >= 25:
+                bits = struct.unpack("<I", head[21:25])[0]
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X" and len(head) >= 30:
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return width, height
+            return None
+        if head[:2] == b"\xff\xd8":
+            f.seek(0)
+            return jpeg_size(f)
+    return None
+
+
+def scan_images(static_dir, inline_max_bytes=0, known=None):
+    # Map every image under static_dir to its dimensions, and to a data URI
+    # when it is at most inline_max_bytes long
+    # known is the previous scan's {relative_path: [mtime_ns, size, width, height]},
+    # so unchanged images are not read again
+    # Returns the map for set_image_info and the state to keep for next time
+    known = known or {}
+    info = {}
+    state = {}
+    for relative_path, dir_entry in walk_files(static_dir):
+        mime = IMAGE_TYPES.get(os.path.splitext(dir_entry.name)[1].lower())
+        if mime is None:
+            continue
+        path = dir_entry.path
+        stat = dir_entry.stat()
+        previous = known.get(relative_path)
+        if previous is not None and previous[:2] == [stat.st_mtime_ns, stat.st_size]:
+            size = previous[2:]
+        else:
+            try:
+                size = image_size(path)
+            except (OSError, struct.error):
+                size = None
+            size = list(size) if size else [None, None]
+        state[relative_path] = [stat.st_mtime_ns, stat.st_size] + size
+        entry = {}
+        if size[0]:
+            entry["width"], entry["height"] = size
+        if stat.st_size <= inline_max_bytes:
+            with open(path, "rb") as f:
+                entry["data"] = f"data:{mime};base64,{base64.b64encode(f.read()).decode()}"
+        info["/" + relative_path.replace(os.sep, "/")] = entry
+    return info, state
+
+
+def image_props(url):
+    # Return the extra <img> attributes for a URL, or None with images off
+    # Inlined images load with the page, so only linked ones are lazy
+    # Relative URLs are looked up against the page being rendered
+    if image_info is None:
+        return None
+    entry = image_info.get(site_path(split_url(url)[0]))
+    props = {}
+    if entry is not None:
+        if "data" in entry:
+            props["src"] = entry["data"]
+        if "width" in entry:
+            props["width"] = str(entry["width"])
+            props["height"] = str(entry["height"])
+    if "src" not in props:
+        props["loading"] = "lazy"
+        props["decoding"] = "async"
+    return props
+
+
+def update_image_info(static_dir, manifest, inline_images):
+    # Read the dimensions of every image under static_dir for the image
+    # attributes, or turn them off when inline_images is None
+    # Returns whether the rendered attributes changed
+    old_salt = image_salt
+    if inline_images is None:
+        manifest.pop("images", None)
+        set_image_info(None)
+    else:
+        info, manifest["images"] = scan_images(static_dir, inline_images, manifest.get("images"))
+        set_image_info(info)
+    return image_salt != old_salt
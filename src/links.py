@@ -0,0 +1,72 @@
+import os
+import posixpath
+
+from assets import split_url
+
+EXTERNAL_SCHEMES = ("http:", "https:", "mailto:", "tel:", "data:", "ftp:", "javascript:")
+
+
+def route(relative_path):
+    # Return the site path of a file in the output directory
+    return "/" + relative_path.replace(os.sep, "/")
+
+
+def site_routes(manifest, dest_dir_path):
+    # Collect every path the build produces: pages, static files under their
+    # output names and, when fingerprinting, the names links use in markdown
+    routes = set()
+    for entry in manifest["pages"].values():
+        routes.add(route(os.path.relpath(entry["dest"], dest_dir_path)))
+    for relative_path in manifest["assets"]:
+        routes.add(route(relative_path))
+    for relative_path in manifest.get("fingerprints", {}):
+        routes.add(route(relative_path))
+    return routes
+
+
+def link_target(url, page_route):
+    # Return the site path a link points at, or None for links to other sites
+    # and to anchors on the same page
+    path = split_url(url)[0]
+    if not path or path.startswith("//") or path.lower().startswith(EXTERNAL_SCHEMES):
+        return None
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(page_route), path)
+    trailing = "/" if path.endswith("/") else ""
+    path = posixpath.normpath(path)
+    return path if path == "/" else path + trailing
+
+
+def link_exists(target, routes):
+    # Pages can be linked as /a.html, /a, /dir/ or /dir
+    if target in routes:
+        return True
+    if target.endswith("/"):
+        return target + "index.html" in routes
+    return target + ".html" in routes or target + "/index.html" in routes
+
+
+def find_broken_links(manifest, dest_dir_path):
+    # Check the links every page recorded at render time against the routes
+    # of the build, without reading anything in dest_dir_path
+    # Returns (markdown_path, line, url) for each broken link, plus the
+    # number of links checked
+    routes = site_routes(manifest, dest_dir_path)
+    broken = []
+    checked = 0
+    for markdown_path, entry in sorted(manifest["pages"].items()):
+        page_route = route(os.path.relpath(entry["dest"], dest_dir_path))
+        for line, url in entry.get("links", ()):
+            target = link_target(url, page_route)
+            if target is None:
+                continue
+            checked += 1
+            if not link_exists(target, routes):
+                broken.append((markdown_path, line, url))
+    return broken, checked
+
+
+def report_broken_links(broken, checked):
+    print(f"Links: {checked} checked, {len(broken)} broken")
+    for markdown_path, line, url in broken:
+        print(f"  {markdown_path}:{line}: {url}")
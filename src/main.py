@@ -1,75 +1,189 @@
+import argparse
 import os
 import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import htmlnode
-from delimiter import markdown_to_html_node
-
-
-def extract_title(markdown):
-    # Extract the title from the markdown file
-    title = None
-    for line in markdown.split("\n"):
-        if line.startswith("# "):
-            title = line[2:].strip()
-            break
-    return title
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    # Generate pages recursively from the content directory
-    for root, dirs, files in os.walk(dir_path_content):
-        for file in files:
-            if file.endswith('.md'):
-                markdown_path = os.path.join(root, file)
-                relative_path = os.path.relpath(markdown_path, dir_path_content)
-                dest_path = os.path.join(dest_dir_path, relative_path.replace('.md', '.html'))
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                generate_page(markdown_path, template_path, dest_path)
-
-
-def generate_page(from_path, template_path, dest_path):
-    # Generate a page from a markdown file
-    print(f"Generating page {from_path} to {dest_path} using {template_path}")
-
-    with open(from_path, "r") as f:
-        markdown = f.read()
-    with open(template_path, "r") as t:
-        template = t.read()
-    html_string = markdown_to_html_node(markdown).to_html()
-    title = extract_title(markdown) or ""
-    html_string = template.replace("{{ Content }}", html_string)
-    html_string = html_string.replace("{{ Title }}", title)
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as d:
-        d.write(html_string)
-
-
-def copy_files(source, destination):
+from assets import Fingerprinter, rewrite_references, set_asset_urls, write_asset_manifest, write_headers
+from cache import ParseCache
+from compress import compress_outputs, remove_compressed
+from discovery import walk_files
+from images import update_image_info
+from links import find_broken_links, report_broken_links
+from manifest import load_manifest, new_manifest, save_manifest
+from pages import RENDERERS, generate_pages_recursive, output_paths, set_renderer
+from search import SearchIndex
+from sync import sync_files
+from watch import watch
+import tracing
+
+MANIFEST_PATH = ".sitegen-manifest.json"
+CACHE_DIR = ".sitegen-cache"
+SEARCH_DIR = os.path.join("public", "search")
+ASSET_MANIFEST = "asset-manifest.json"
+HEADERS_FILE = "_headers"
+
+
+def copy_files(source, destination, manifest=None, use_hash=False, fingerprint=False, reserved=()):
     # Copy files from source to destination
-    os.makedirs(destination, exist_ok=True)
-
-    for root, dirs, files in os.walk(source):
-        for file in files:
-            if '.git' in root:
-                continue
-            source_file = os.path.join(root, file)
-
-            relative_path = os.path.relpath(source_file, source)
-            destination_file = os.path.join(destination, relative_path)
-
-            os.makedirs(os.path.dirname(destination_file), exist_ok=True)
-
-            shutil.copy(source_file, destination_file)
-            print(f"Moved {source_file} to {destination_file}")
+    # With a manifest, only changed files are copied and files whose source
+    # was deleted since the last build are removed
+    # With fingerprint, assets get content-hashed names, pages and static
+    # HTML files are written with references to those names, and an asset
+    # manifest and a _headers file marking them immutable are written next
+    # to them
+    # Files whose relative path is in reserved are left to the pages
+    if fingerprint and manifest is None:
+        manifest = new_manifest()
+    if manifest is not None:
+        rename = Fingerprinter(manifest.get("fingerprints")) if fingerprint else None
+        rewrite = None
+        if rename is not None:
+            def rewrite(relative_path, html):
+                route = "/" + relative_path.replace(os.sep, "/")
+                return rewrite_references(html, route, rename.urls)
+        manifest["assets"], stats = sync_files(source, destination, manifest["assets"], use_hash, rename, rewrite, reserved)
+        if rename is None:
+            manifest.pop("fingerprints", None)
+            set_asset_urls({})
+            for name in (ASSET_MANIFEST, HEADERS_FILE):
+                if os.path.exists(os.path.join(destination, name)):
+                    os.remove(os.path.join(destination, name))
+        else:
+            manifest["fingerprints"] = rename.fingerprints
+            set_asset_urls(rename.urls)
+            write_asset_manifest(rename.urls, os.path.join(destination, ASSET_MANIFEST))
+            write_headers(rename.urls, os.path.join(destination, HEADERS_FILE))
+        return stats
 
-
-def main():
-
-    if os.path.exists("public"):
-        shutil.rmtree("public")
-
-    copy_files("static", "public")
-    generate_pages_recursive("content", "template.html", "public")
+    os.makedirs(destination, exist_ok=True)
+    made_dirs = {destination}
+
+    for relative_path, entry in walk_files(source):
+        if relative_path in reserved:
+            continue
+        source_file = entry.path
+        destination_file = os.path.join(destination, relative_path)
+
+        destination_dir = os.path.dirname(destination_file)
+        if destination_dir not in made_dirs:
+            os.makedirs(destination_dir, exist_ok=True)
+            made_dirs.add(destination_dir)
+
+        shutil.copy(source_file, destination_file)
+        print(f"Moved {source_file} to {destination_file}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site from content/ and static/")
+    parser.add_argument("command", nargs="?", choices=["build", "watch"], default="build",
+                        help="build once, or build and then rebuild on changes (default: build)")
+    parser.add_argument("--clean", action="store_true", help="delete public/ and rebuild every page")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="render pages in N worker processes")
+    parser.add_argument("--hash", action="store_true", help="compare static files by content when size matches but mtime differs")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome/Perfetto trace of every page's stages to FILE")
+    parser.add_argument("--no-cache", action="store_true", help="parse every rebuilt page instead of reusing cached bodies")
+    parser.add_argument("--cache-size", type=int, default=512, help="parse cache size limit in MB (default: 512)")
+    parser.add_argument("--layouts", default="layouts", help="directory of named layouts (default: layouts)")
+    parser.add_argument("--fingerprint", action="store_true", help="give assets content-hashed names and rewrite references to them")
+    parser.add_argument("--images", action="store_true", help="add width, height and lazy loading to images under static/")
+    parser.add_argument("--inline-images", type=int, default=0, metavar="BYTES",
+                        help="with --images, inline images up to BYTES long as data URIs (default: 0)")
+    parser.add_argument("--check-links", action="store_true",
+                        help="report internal links and images that point at nothing the build produced, and exit with 1")
+    parser.add_argument("--search", action="store_true", help="write a search index sharded by term prefix to public/search/")
+    parser.add_argument("--compress", action="store_true", help="write .gz (and .zst when available) siblings of text outputs")
+    parser.add_argument("--compress-min-size", type=int, default=1024, help="smallest output in bytes worth compressing (default: 1024)")
+    parser.add_argument("--partials", default="partials", help="directory of files for {{ include name }} (default: partials)")
+    parser.add_argument("--renderer", choices=RENDERERS, default="tree",
+                        help="render page bodies through a node tree or straight to HTML (default: tree)")
+    args = parser.parse_args(argv)
+    if args.fingerprint and args.command == "watch":
+        parser.error("--fingerprint cannot be combined with watch")
+
+    if args.clean:
+        if os.path.exists("public"):
+            shutil.rmtree("public")
+        if os.path.exists(MANIFEST_PATH):
+            os.remove(MANIFEST_PATH)
+        if os.path.exists(CACHE_DIR):
+            shutil.rmtree(CACHE_DIR)
+
+    if args.trace:
+        tracing.enable()
+    set_renderer(args.renderer)
+
+    cache = None if args.no_cache else ParseCache(CACHE_DIR, args.cache_size * 1024 * 1024)
+    manifest = load_manifest(MANIFEST_PATH)
+    inline_images = args.inline_images if args.images else None
+    update_image_info("static", manifest, inline_images)
+    search = SearchIndex(SEARCH_DIR) if args.search else None
+    if search is None:
+        # Pages built later with the index on must all be added back to it
+        for entry in manifest["pages"].values():
+            entry.pop("search", None)
+        if os.path.exists(SEARCH_DIR):
+            shutil.rmtree(SEARCH_DIR)
+    # A page and a static file may share an output path; the page wins, so
+    # static files never overwrite a page
+    page_paths = output_paths("content", manifest)
+    copy_static = partial(
+        copy_files, "static", "public", manifest,
+        use_hash=args.hash, fingerprint=args.fingerprint, reserved=page_paths,
+    )
+    # Outputs of deleted pages are removed while pages render, and a static
+    # file may take the place of one
+    pages_deleted = any(
+        os.path.relpath(entry["dest"], "public") not in page_paths
+        for entry in manifest["pages"].values() if entry.get("dest")
+    )
+    # Static files are copied while pages render, unless pages need the
+    # fingerprinted asset names first or a deleted page's output must be
+    # gone before they are copied
+    with ThreadPoolExecutor(max_workers=1) as static_pool:
+        static_copy = None
+        if args.fingerprint:
+            copy_static()
+        elif not pages_deleted:
+            static_copy = static_pool.submit(copy_static)
+        generate_pages_recursive(
+            "content", "template.html", "public", manifest,
+            jobs=args.jobs, layouts_dir=args.layouts, cache=cache, partials_dir=args.partials, search=search,
+        )
+        if static_copy is not None:
+            static_copy.result()
+        elif not args.fingerprint:
+            copy_static()
+    # The manifest records the compressed siblings written, so turning
+    # compression off removes them rather than leaving stale copies behind
+    if args.compress:
+        compress_outputs("public", args.compress_min_size, jobs=args.jobs, manifest=manifest)
+    else:
+        remove_compressed(manifest)
+    save_manifest(manifest, MANIFEST_PATH)
+    broken = []
+    if args.check_links:
+        broken, checked = find_broken_links(manifest, "public")
+        report_broken_links(broken, checked)
+
+    if args.trace:
+        trace_events = tracing.take_events()
+        tracing.write_chrome_trace(trace_events, args.trace)
+        tracing.summarize(trace_events)
+        print(f"Wrote trace to {args.trace}")
+        tracing.disable()
+
+    if args.command == "watch":
+        watch(
+            "content", "template.html", "static", "public", manifest, MANIFEST_PATH,
+            layouts_dir=args.layouts, cache=cache, partials_dir=args.partials,
+            compress_min_size=args.compress_min_size if args.compress else None,
+            inline_images=inline_images, search=search,
+        )
+    return 1 if broken else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
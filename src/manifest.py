@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 2
+
+
+def hash_bytes(data):
+    # Return the hex sha256 digest of some bytes
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path):
+    # Return the hex sha256 digest of a file, reading it in chunks
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def new_manifest():
+    # Return an empty build manifest
+    return {"version": MANIFEST_VERSION, "pages": {}, "assets": {}}
+
+
+def load_manifest(path):
+    # Load the build manifest, or an empty one if it is missing or unreadable
+    if not os.path.exists(path):
+        return new_manifest()
+    try:
+        with open(path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return new_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+    manifest.setdefault("pages", {})
+    manifest.setdefault("assets", {})
+    return manifest
+
+
+def save_manifest(manifest, path):
+    # Write the build manifest, replacing the old one only once it is complete
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def cached_hash(path, file_hashes):
+    # Hash a file once per build, returning None when it no longer exists
+    if path not in file_hashes:
+        file_hashes[path] = hash_file(path) if os.path.exists(path) else None
+    return file_hashes[path]
+
+
+def page_is_fresh(entry, source_hash, template_hash, dest_path, file_hashes=None, salt=""):
+    # Check whether a page recorded in the manifest can be reused as is
+    # Every partial the page included last time must also be unchanged, and
+    # salt covers build options that change the output, like asset names
+    if entry is None:
+        return False
+    if entry.get("dest") != dest_path:
+        return False
+    if entry.get("source") != source_hash or entry.get("template") != template_hash:
+        return False
+    if entry.get("salt", "") != salt:
+        return False
+    if file_hashes is None:
+        file_hashes = {}
+    for path, digest in entry.get("deps", {}).items():
+        if cached_hash(path, file_hashes) != digest:
+            return False
+    if not os.path.exists(dest_path):
+        return False
+    return hash_file(dest_path) == entry.get("output")
+
+
+def remove_stale_outputs(old_pages, new_pages, dest_dir_path):
+    # Remove outputs of pages whose markdown source no longer exists
+    removed = 0
+    for source_path, entry in old_pages.items():
+        if source_path in new_pages:
+            continue
+        dest_path = entry.get("dest")
+        if dest_path and os.path.exists(dest_path):
+            os.remove(dest_path)
+            print(f"Removed stale page {dest_path}")
+            remove_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+        removed += 1
+    return removed
+
+
+def remove_empty_dirs(path, stop_path):
+    # Remove empty directories from path upwards, stopping at stop_path
+    stop_path = os.path.abspath(stop_path)
+    path = os.path.abspath(path)
+    while path != stop_path and path.startswith(stop_path + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
@@ -0,0 +1,42 @@
+import os
+
+
+def same_contents(path_a, path_b, chunk_size=1024 * 1024):
+    # Compare two files by size, then byte for byte in chunks
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, "rb") as a, open(path_b, "rb") as b:
+        while True:
+            chunk = a.read(chunk_size)
+            if chunk != b.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+
+class OutputFile:
+    # Write an output file atomically, leaving it untouched when unchanged
+    # Writes go to a temp file next to path, which replaces path on close only
+    # when the bytes differ, so unchanged outputs keep their mtime and readers
+    # never see a half-written file
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.changed = None
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, "w")
+        return self.file
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is not None:
+            os.remove(self.tmp_path)
+            return False
+        if os.path.exists(self.path) and same_contents(self.tmp_path, self.path):
+            os.remove(self.tmp_path)
+            self.changed = False
+        else:
+            os.replace(self.tmp_path, self.path)
+            self.changed = True
+        return False
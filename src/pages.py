@@ -0,0 +1,511 @@
+import json
+import os
+import posixpath
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import assets
+from assets import set_asset_urls, set_page_route
+from delimiter import PARSER_VERSION, markdown_to_html, markdown_to_html_node
+from discovery import scan_tree, tree_files, walk_files
+import images
+from htmlnode import escape_attribute
+from images import set_image_info
+from manifest import (
+    cached_hash,
+    hash_file,
+    page_is_fresh,
+    remove_stale_outputs,
+)
+from output import OutputFile
+from partials import expand_includes, source_line
+from pipeline import batched, bounded_map
+from search import page_terms
+from stream import StreamedBody, scan_title
+from template import load_template, select_layout
+import tracing
+from tracing import span
+
+
+def extract_title(markdown):
+    # Extract the title from the markdown file
+    title = None
+    for line in markdown.split("\n"):
+        if line.startswith("# "):
+            title = line[2:].strip()
+            break
+    return title
+
+
+def parse_front_matter(lines):
+    # Parse "key: value" lines between --- fences at the top of a page
+    # Returns the metadata and the number of lines it used, or None without front matter
+    if not lines or lines[0].rstrip() != "---":
+        return None
+    meta = {}
+    for i in range(1, len(lines)):
+        line = lines[i].rstrip()
+        if line == "---":
+            return meta, i + 1
+        key, sep, value = line.partition(":")
+        if not sep or not key.strip():
+            return None
+        meta[key.strip()] = value.strip()
+    return None
+
+
+def split_front_matter(markdown):
+    # Split a page into its front matter metadata and its markdown body
+    if not markdown.startswith("---"):
+        return {}, markdown
+    lines = markdown.split("\n")
+    parsed = parse_front_matter(lines)
+    if parsed is None:
+        return {}, markdown
+    meta, used = parsed
+    return meta, "\n".join(lines[used:])
+
+
+def read_header(f):
+    # Read the front matter at the top of an open page, leaving the file at
+    # the start of the body; returns the metadata and the number of lines it used
+    first = f.readline()
+    if first.rstrip() == "---":
+        lines = [first]
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line)
+            if line.rstrip() == "---":
+                break
+        parsed = parse_front_matter(lines)
+        if parsed is not None:
+            return parsed
+    f.seek(0)
+    return {}, 0
+
+
+def read_front_matter(path):
+    # Read only the front matter at the top of a page
+    with open(path, "r") as f:
+        return read_header(f)[0]
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, jobs=1, layouts_dir="layouts", cache=None, partials_dir="partials", search=None):
+    # Generate pages recursively from the content directory
+    # Each page uses the layout named in its front matter or its directory's
+    # .layout file, falling back to template_path
+    # With a manifest, pages whose markdown, template and output are unchanged
+    # since the last build are reused, and outputs of deleted pages are removed
+    # The manifest also records the partials each page included, so editing a
+    # partial rebuilds exactly the pages that use it
+    # With a ParseCache, pages whose markdown was rendered before skip parsing
+    # With a SearchIndex, rebuilt and removed pages are updated in the index
+    # Pages stream through reading, rendering and writing; without a
+    # manifest discovery streams too, so the first pages are written while
+    # the content directory is still being walked, while with one the
+    # directory snapshot is brought up to date before any page is planned
+    start = time.perf_counter()
+    stats = {"rebuilt": 0, "reused": 0, "removed": 0}
+    layout_cache = {}
+    file_hashes = {}
+    pages = {}
+
+    relative_paths = content_paths(dir_path_content, manifest)
+
+    def planned():
+        made_dirs = set()
+        for relative_path in relative_paths:
+            markdown_path = os.path.join(dir_path_content, relative_path)
+            entry, task = plan_page(
+                markdown_path, dir_path_content, template_path, dest_dir_path,
+                manifest, layouts_dir, layout_cache, file_hashes, cache, partials_dir, search, relative_path,
+            )
+            if entry is not None:
+                pages[markdown_path] = entry
+            if task is None:
+                stats["reused"] += 1
+                continue
+            # Each output directory is created once, before its pages are written
+            dest_dir = os.path.dirname(task[2])
+            if dest_dir not in made_dirs:
+                os.makedirs(dest_dir, exist_ok=True)
+                made_dirs.add(dest_dir)
+            yield task
+
+    if search is not None and manifest is None:
+        search.reset()
+    for task, (pid, elapsed, output_hash, info, events) in render_pages(planned(), jobs):
+        tracing.events.extend(events)
+        if manifest is not None:
+            entry = pages[task[0]]
+            old_entry = manifest["pages"].get(task[0]) or {}
+            record_output(entry, output_hash, info, file_hashes)
+            if search is not None:
+                entry["search"] = search.update(
+                    page_route(task[2], dest_dir_path), info["title"], info["terms"], old_entry.get("search", ()),
+                )
+        elif search is not None:
+            search.add(page_route(task[2], dest_dir_path), info["title"], info["terms"])
+        stats["rebuilt"] += 1
+
+    if manifest is not None:
+        if search is not None:
+            for markdown_path, entry in manifest["pages"].items():
+                if markdown_path not in pages:
+                    search.remove(page_route(entry["dest"], dest_dir_path), entry.get("search", ()))
+        stats["removed"] = remove_stale_outputs(manifest["pages"], pages, dest_dir_path)
+        manifest["pages"] = pages
+    if search is not None:
+        search.write()
+    if cache is not None and stats["rebuilt"]:
+        cache.evict()
+    elapsed = time.perf_counter() - start
+    print(
+        f"Pages: {stats['rebuilt']} rebuilt, {stats['reused']} reused, "
+        f"{stats['removed']} removed in {elapsed:.2f}s"
+    )
+    return stats
+
+
+def content_paths(dir_path_content, manifest=None):
+    # Yield the relative path of every page in the content directory
+    # With a manifest, directories unchanged since the last build are not
+    # listed again, but the whole tree is checked before the first path
+    if manifest is not None:
+        manifest["content_dirs"] = scan_tree(dir_path_content, manifest.get("content_dirs"))
+        return tree_files(manifest["content_dirs"], ".md")
+    return (relative_path for relative_path, entry in walk_files(dir_path_content, ".md"))
+
+
+def output_paths(dir_path_content, manifest=None):
+    # Return the paths pages are written to, relative to the output directory
+    return {relative_path.replace('.md', '.html') for relative_path in content_paths(dir_path_content, manifest)}
+
+
+def plan_page(markdown_path, dir_path_content, template_path, dest_dir_path, manifest, layouts_dir, layout_cache, file_hashes, cache=None, partials_dir="partials", search=None, relative_path=None):
+    # Work out where a page goes, which layout it uses and whether it needs rendering
+    # Returns the page's manifest entry (None without a manifest) and its
+    # render task (None when the existing output can be reused)
+    if relative_path is None:
+        relative_path = os.path.relpath(markdown_path, dir_path_content)
+    dest_path = os.path.join(dest_dir_path, relative_path.replace('.md', '.html'))
+    meta = read_front_matter(markdown_path)
+    page_template = select_layout(
+        markdown_path, dir_path_content, meta, template_path, layouts_dir, layout_cache
+    )
+    route = page_route(dest_path, dest_dir_path)
+    task = (markdown_path, page_template, dest_path, manifest is not None, cache, partials_dir, route)
+    if manifest is None:
+        return None, task
+
+    template_hash = cached_hash(page_template, file_hashes)
+    source_hash = hash_file(markdown_path)
+    entry = manifest["pages"].get(markdown_path)
+    salt = render_salt()
+    # Pages last built without the search index have no terms in it yet
+    if page_is_fresh(entry, source_hash, template_hash, dest_path, file_hashes, salt) and (
+        search is None or "search" in entry
+    ):
+        return entry, None
+    entry = {
+        "dest": dest_path,
+        "source": source_hash,
+        "template": template_hash,
+    }
+    if salt:
+        entry["salt"] = salt
+    return entry, task
+
+
+def page_route(dest_path, dest_dir_path):
+    # Return the site path a page is served at
+    return "/" + os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+
+
+def record_output(entry, output_hash, info, file_hashes):
+    # Store what a render produced, the partials it depended on and the
+    # [line, url] of every link and image on the page
+    entry["output"] = output_hash
+    if info["links"]:
+        entry["links"] = info["links"]
+    if info["deps"]:
+        entry["deps"] = {path: cached_hash(path, file_hashes) for path in sorted(info["deps"])}
+
+
+def generate_single_page(markdown_path, dir_path_content, template_path, dest_dir_path, manifest=None, layouts_dir="layouts", cache=None, partials_dir="partials", search=None):
+    # Generate one page of the content directory, updating its manifest entry
+    # Returns whether the page was rendered
+    file_hashes = {}
+    entry, task = plan_page(
+        markdown_path, dir_path_content, template_path, dest_dir_path,
+        manifest, layouts_dir, {}, file_hashes, cache, partials_dir, search,
+    )
+    if task is not None:
+        pid, elapsed, output_hash, info, events = render_task(task)
+        tracing.events.extend(events)
+        if entry is not None:
+            old_entry = manifest["pages"].get(markdown_path) or {}
+            record_output(entry, output_hash, info, file_hashes)
+            if search is not None:
+                entry["search"] = search.update(
+                    page_route(task[2], dest_dir_path), info["title"], info["terms"], old_entry.get("search", ()),
+                )
+                search.write()
+    if manifest is not None:
+        manifest["pages"][markdown_path] = entry
+    return task is not None
+
+
+# Threads reading markdown and writing pages while the main thread parses
+IO_THREADS = 4
+# Pages per batch sent to a worker process
+RENDER_BATCH = 16
+# Pages at least this large are converted a block at a time while they are
+# written instead of being read whole
+STREAM_MIN_BYTES = 8 * 1024 * 1024
+# How page bodies are rendered: "tree" builds a node tree and renders it,
+# "direct" writes HTML straight from the parser; both give the same bytes
+RENDERERS = ("tree", "direct")
+renderer = "tree"
+
+
+def set_renderer(name):
+    global renderer
+    if name not in RENDERERS:
+        raise ValueError(f"Unknown renderer '{name}'")
+    renderer = name
+
+
+def render_task(task):
+    # Generate one page and report which process did it and how long it took,
+    # handing back what generate_page found and any trace events so they
+    # reach the parent process
+    from_path, template_path, dest_path, want_hash, cache, partials_dir, route = task
+    start = time.perf_counter()
+    try:
+        info = generate_page(from_path, template_path, dest_path, cache, partials_dir, route)
+    except ValueError as error:
+        raise ValueError(f"{from_path}: {error}") from error
+    output_hash = hash_file(dest_path) if want_hash else None
+    events = tracing.take_events() if tracing.enabled else []
+    return os.getpid(), time.perf_counter() - start, output_hash, info, events
+
+
+def render_batch(tasks):
+    return [(task, render_task(task)) for task in tasks]
+
+
+def read_source(task):
+    # Read a page's markdown ahead of rendering; pages large enough to
+    # stream are left for render_source to read as it goes
+    with open(task[0], "r") as f:
+        if os.fstat(f.fileno()).st_size >= STREAM_MIN_BYTES:
+            return task, None
+        return task, f.read()
+
+
+def render_source(item):
+    # Render a page read by read_source, streaming it into its output file
+    task, markdown = item
+    from_path, template_path, dest_path, want_hash, cache, partials_dir, route = task
+    start = time.perf_counter()
+    print(f"Generating page {from_path} to {dest_path} using {template_path}")
+    set_page_route(route)
+    try:
+        template = load_template(template_path, partials_dir)
+        if markdown is None:
+            info = stream_page(from_path, template, dest_path, partials_dir)
+        else:
+            values, info = prepare_page(markdown, template, cache, partials_dir)
+            write_page(dest_path, template, values)
+    except ValueError as error:
+        # Name the page, since the parser's errors do not
+        raise ValueError(f"{from_path}: {error}") from error
+    return task, info, start
+
+
+def hash_output(item):
+    # Only the read of the written page happens here, which releases the GIL
+    task, info, start = item
+    dest_path, want_hash = task[2], task[3]
+    output_hash = hash_file(dest_path) if want_hash else None
+    return task, (os.getpid(), time.perf_counter() - start, output_hash, info, [])
+
+
+def render_pages(tasks, jobs=1):
+    # Render pages as their tasks arrive, yielding (task, result) in task order
+    # With jobs > 1 batches of pages are rendered in worker processes;
+    # otherwise markdown is read and written pages are hashed on a thread
+    # pool while this process parses and streams pages into their files, so
+    # the disk and the CPU are busy at the same time
+    # Every stage runs a bounded number of pages ahead of the next one
+    if jobs > 1:
+        yield from render_pages_parallel(tasks, jobs)
+    elif tracing.enabled:
+        # Traced builds render pages one at a time so each gets its own span
+        for task in tasks:
+            yield task, render_task(task)
+    else:
+        with ThreadPoolExecutor(max_workers=IO_THREADS) as io_pool:
+            sources = bounded_map(read_source, tasks, io_pool)
+            rendered = bounded_map(render_source, sources)
+            yield from bounded_map(hash_output, rendered, io_pool)
+
+
+def render_salt():
+    # Cover the build options that change rendered pages, and the parser
+    # version so outputs written by an older renderer are not kept as fresh
+    return f"v{PARSER_VERSION}" + assets.asset_salt + images.image_salt
+
+
+def init_worker(trace, asset_urls, image_info, renderer):
+    # Carry the parent's tracing, asset, image and renderer settings into a worker process
+    if trace:
+        tracing.enable()
+    set_asset_urls(asset_urls)
+    set_image_info(image_info)
+    set_renderer(renderer)
+
+
+def render_pages_parallel(tasks, jobs, chunksize=RENDER_BATCH):
+    # Fan page generation out to a process pool in batches of chunksize pages,
+    # yielding (task, result) in task order so the output matches the serial path
+    # At most a few batches per worker are queued, however many tasks there are
+    start = time.perf_counter()
+    workers = {}
+    total = 0
+    initargs = (tracing.enabled, assets.asset_urls, images.image_info, renderer)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs) as executor:
+        for results in bounded_map(render_batch, batched(tasks, chunksize), executor, jobs * 4):
+            for task, result in results:
+                pid, elapsed = result[0], result[1]
+                count, busy = workers.get(pid, (0, 0.0))
+                workers[pid] = (count + 1, busy + elapsed)
+                total += 1
+                yield task, result
+    if not total:
+        return
+    wall = time.perf_counter() - start
+    print(f"Rendered {total} pages with {jobs} jobs in {wall:.2f}s ({total / wall:.1f} pages/s)")
+    for pid, (count, busy) in sorted(workers.items()):
+        rate = count / busy if busy > 0 else 0.0
+        print(f"  worker {pid}: {count} pages, {busy:.2f}s busy, {rate:.1f} pages/s")
+
+
+def page_body(markdown, cache=None):
+    # Return the page body, as a node tree or as HTML from the direct
+    # renderer or the parse cache, with the page's [line, url] links and its
+    # search terms
+    # Cache entries keep the links and terms on their first line, so hits
+    # need no parsing either
+    if cache is not None:
+        salt = render_salt()
+        # Relative asset and image URLs render differently in each directory
+        if assets.asset_urls or images.image_info is not None:
+            salt += posixpath.dirname(assets.page_route)
+        with span("cache lookup"):
+            key = cache.key(markdown, salt)
+            cached = cache.get(key)
+        if cached is not None:
+            found, _, body = cached.partition("\n")
+            links, terms = json.loads(found)
+            return body, links, terms
+    links = []
+    texts = []
+    if renderer == "direct":
+        body = markdown_to_html(markdown, links, texts)
+    else:
+        body = markdown_to_html_node(markdown, links, texts)
+    terms = page_terms(texts)
+    if cache is not None:
+        if not isinstance(body, str):
+            with span("render"):
+                body = body.to_html()
+        cache.put(key, json.dumps([links, terms]) + "\n" + body)
+    return body, links, terms
+
+
+def generate_page(from_path, template_path, dest_path, cache=None, partials_dir="partials", route=None):
+    # Generate a page from a markdown file
+    # Relative asset URLs resolve against route, the site path the page is
+    # served at, which defaults to its file name at the site root
+    # Returns what the build records about the page: its title, the partials
+    # it and its template included, the [line, url] of every link and image
+    # in its markdown and its search terms
+    print(f"Generating page {from_path} to {dest_path} using {template_path}")
+    set_page_route(route or "/" + os.path.basename(dest_path))
+    with span("page", path=from_path):
+        if os.path.getsize(from_path) >= STREAM_MIN_BYTES:
+            template = load_template(template_path, partials_dir)
+            return stream_page(from_path, template, dest_path, partials_dir)
+        with span("read"):
+            with open(from_path, "r") as f:
+                markdown = f.read()
+            template = load_template(template_path, partials_dir)
+        values, info = prepare_page(markdown, template, cache, partials_dir)
+        write_page(dest_path, template, values)
+    return info
+
+
+def page_values(meta, title):
+    # Template values from a page's front matter and title, escaped since
+    # they are page text rather than markup; escaping quotes too keeps them
+    # safe inside attributes
+    values = {key: escape_attribute(value) for key, value in meta.items()}
+    values["Title"] = escape_attribute(title)
+    return values
+
+
+def prepare_page(markdown, template, cache=None, partials_dir="partials"):
+    # Parse a page's markdown and work out everything its template needs
+    # Returns the values to fill the template with and the page's info
+    meta, body_markdown = split_front_matter(markdown)
+    front_matter_lines = markdown.count("\n", 0, len(markdown) - len(body_markdown))
+    included = []
+    markdown, deps = expand_includes(body_markdown, partials_dir, included=included)
+    deps |= template.deps
+    title = meta.get("title") or extract_title(markdown) or ""
+    values = page_values(meta, title)
+    body, links, terms = page_body(markdown, cache)
+    # Links are found in the expanded markdown; report them at their line in the page
+    for link in links:
+        link[0] = source_line(link[0], included) + front_matter_lines
+    values["Content"] = body
+    info = {"title": title, "deps": deps, "links": links, "terms": terms}
+    return values, info
+
+
+def stream_page(from_path, template, dest_path, partials_dir="partials"):
+    # Generate a page without holding its markdown or HTML in memory: the
+    # body is converted a block at a time as the template writes it out
+    # Streamed pages skip the parse cache, whose entries hold whole bodies
+    with open(from_path, "r") as f:
+        meta, used = read_header(f)
+        title = meta.get("title") or scan_title(f) or ""
+        values = page_values(meta, title)
+        deps = set(template.deps)
+        body = StreamedBody(f, used + 1, partials_dir, deps)
+        values["Content"] = body
+        write_page(dest_path, template, values)
+    return {"title": title, "deps": deps, "links": body.links, "terms": body.terms}
+
+
+def write_page(dest_path, template, values):
+    # Fill the template and write the page, streaming the body into the file
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if not tracing.enabled:
+        with OutputFile(dest_path) as d:
+            template.render_to(d, values)
+        return
+
+    # Traced builds render, fill and write one after another so each
+    # stage gets its own span; the output is the same as streaming
+    body = values["Content"]
+    with span("render"):
+        values["Content"] = body if isinstance(body, str) else body.to_html()
+    with span("template fill"):
+        html_string = template.render(values)
+    with span("write"):
+        with OutputFile(dest_path) as d:
+            d.write(html_string)
@@ -0,0 +1,73 @@
+import os
+import re
+
+INCLUDE_PATTERN = re.compile(r"\{\{\s*include\s+\"?([^\"\s}]+)\"?\s*\}\}")
+
+partial_cache = {}
+
+
+def read_partial(path):
+    # Read a partial, reusing the last read until the file changes
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = partial_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "r") as f:
+        text = f.read()
+    partial_cache[path] = (key, text)
+    return text
+
+
+def expand_includes(text, partials_dir, stack=(), included=None):
+    # Replace {{ include name }} directives with the named files from partials_dir
+    # Includes may nest; returns the expanded text and the set of partials used
+    # With an included list, (start, end, line, shift) is appended for each
+    # top-level directive: the expanded lines start..end it became, the
+    # source line it was on, and how many lines expansions up to and
+    # including it added, for source_line
+    if "include" not in text:
+        return text, set()
+    deps = set()
+    # Source position, its line and the line shift after the previous directive
+    position, line, shift = 0, 1, 0
+
+    def replace(match):
+        nonlocal position, line, shift
+        path = os.path.join(partials_dir, match.group(1))
+        if path in stack:
+            raise ValueError(f"Include cycle: {' -> '.join(stack + (path,))}")
+        if not os.path.exists(path):
+            raise ValueError(f"Missing partial: {path}")
+        expanded, nested = expand_includes(read_partial(path), partials_dir, stack + (path,))
+        deps.add(path)
+        deps.update(nested)
+        if included is not None:
+            line += text.count("\n", position, match.start())
+            start = line + shift
+            end = start + expanded.count("\n")
+            directive_lines = match.group(0).count("\n")
+            shift += end - start - directive_lines
+            included.append((start, end, line, shift))
+            position = match.end()
+            line += directive_lines
+        return expanded
+
+    return INCLUDE_PATTERN.sub(replace, text), deps
+
+
+def source_line(line, included):
+    # Map a line of text expanded by expand_includes back to its source line
+    # Lines that came from a partial map to the line of its include directive
+    shift = 0
+    for start, end, directive_line, shift_after in included:
+        if line < start:
+            break
+        if line <= end:
+            return directive_line
+        shift = shift_after
+    return line - shift
+
+
+def clear_partial_cache():
+    partial_cache.clear()
@@ -0,0 +1,34 @@
+from collections import deque
+
+# Items each stage may run ahead of the next one, which bounds the memory a
+# build holds however many pages it has
+STAGE_LIMIT = 64
+
+
+def bounded_map(func, items, executor=None, limit=STAGE_LIMIT):
+    # Like executor.map, but pulls items lazily and keeps at most limit of
+    # them in flight, so a slow consumer holds back the stages before it
+    # Results come back in order; without an executor func runs inline
+    if executor is None:
+        for item in items:
+            yield func(item)
+        return
+    pending = deque()
+    for item in items:
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(items, size):
+    # Group items into lists of up to size, for executors with a per-call cost
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import shutil
+
+from output import OutputFile
+
+TERM_PATTERN = re.compile(r"\w\w+")
+DOCS_FILE = "docs.json"
+# Bumped when what the manifest records about indexed pages changes, so
+# shards written under the old scheme are rebuilt rather than updated
+INDEX_VERSION = 2
+
+
+def page_terms(texts):
+    # Count the lowercased words of a page's text
+    terms = {}
+    for text in texts:
+        for term in TERM_PATTERN.findall(text.lower()):
+            terms[term] = terms.get(term, 0) + 1
+    return terms
+
+
+class SearchIndex:
+    # Inverted index of the site for client-side search, written as one JSON
+    # shard per term prefix ({term: {route: count}}) plus docs.json with the
+    # page titles, so a browser fetches only the shards its query needs
+    # Pages are added and removed one at a time, and write() only rewrites
+    # the shards that changed
+    def __init__(self, directory, prefix_length=2):
+        self.directory = directory
+        self.prefix_length = prefix_length
+        self.shards = {}
+        self.dirty = set()
+        self.docs = None
+
+    def shard_path(self, prefix):
+        return os.path.join(self.directory, f"{prefix}.json")
+
+    def load(self, path, default):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return default
+
+    def shard(self, prefix):
+        if prefix not in self.shards:
+            self.shards[prefix] = self.load(self.shard_path(prefix), {})
+        return self.shards[prefix]
+
+    def load_docs(self):
+        if self.docs is None:
+            stored = self.load(os.path.join(self.directory, DOCS_FILE), {})
+            if stored.get("prefix") == self.prefix_length and stored.get("version") == INDEX_VERSION:
+                self.docs = stored.get("docs", {})
+            else:
+                # Shards cut at another prefix length, or by an older
+                # version, cannot be updated
+                self.reset()
+        return self.docs
+
+    def remove(self, route, terms):
+        # Drop a page's postings for the terms it was added with, so the cost
+        # follows the page rather than the size of its shards
+        self.load_docs().pop(route, None)
+        for term in terms:
+            prefix = term[:self.prefix_length]
+            shard = self.shard(prefix)
+            postings = shard.get(term)
+            if postings is not None and postings.pop(route, None) is not None:
+                if not postings:
+                    del shard[term]
+                self.dirty.add(prefix)
+
+    def add(self, route, title, terms):
+        # Add a page's {term: count} and return its terms, for remove()
+        self.load_docs()[route] = title
+        for term, count in terms.items():
+            prefix = term[:self.prefix_length]
+            self.shard(prefix).setdefault(term, {})[route] = count
+            self.dirty.add(prefix)
+        return sorted(terms)
+
+    def update(self, route, title, terms, old_terms=()):
+        self.remove(route, old_terms)
+        return self.add(route, title, terms)
+
+    def reset(self):
+        # Start from an empty index, for builds without a manifest
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
+        self.shards = {}
+        self.dirty = set()
+        self.docs = {}
+
+    def write(self):
+        # Write the changed shards and the page list, returning the shard count
+        os.makedirs(self.directory, exist_ok=True)
+        written = 0
+        for prefix in sorted(self.dirty):
+            shard = self.shards[prefix]
+            path = self.shard_path(prefix)
+            if not shard:
+                if os.path.exists(path):
+                    os.remove(path)
+                continue
+            with OutputFile(path) as f:
+                json.dump(shard, f, sort_keys=True, separators=(",", ":"))
+            written += 1
+        with OutputFile(os.path.join(self.directory, DOCS_FILE)) as f:
+            json.dump(
+                {"prefix": self.prefix_length, "version": INDEX_VERSION, "docs": self.load_docs()},
+                f, sort_keys=True, separators=(",", ":"),
+            )
+        self.dirty = set()
+        return written
@@ -0,0 +1,50 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from pages import generate_pages_recursive
+from template import clear_template_cache
+
+
+class SiteTestCase(unittest.TestCase):
+    # A throwaway site in a temp directory for tests that build pages
+    # Only content/ exists up front; write() creates the other directories
+    # as files are put in them
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.partials = os.path.join(self.root, "partials")
+        self.layouts = os.path.join(self.root, "layouts")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(self.content)
+
+    def tearDown(self):
+        clear_template_cache()
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        # Write a file, moving its mtime on so the change is visible even
+        # on coarse mtime filesystems
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def quietly(self, func, *args, **kwargs):
+        # Call func without its progress output
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func(*args, **kwargs)
+
+    def generate(self, manifest=None, **kwargs):
+        # Build the pages under content/ into public/
+        return self.quietly(generate_pages_recursive, self.content, self.template, self.public, manifest, **kwargs)
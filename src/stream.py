@@ -0,0 +1,130 @@
+import io
+
+from delimiter import (
+    add_references,
+    block_to_block_type,
+    block_to_html_node,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+from partials import expand_includes, source_line
+from search import page_terms
+
+# Characters read from a streamed page at a time
+CHUNK_SIZE = 1024 * 1024
+
+
+def iter_raw_blocks(f, line=1, chunk_size=CHUNK_SIZE):
+    # Yield (line, segment) for the pieces of a file between "\n\n"
+    # separators, the same pieces markdown.split("\n\n") gives, reading
+    # chunk_size characters at a time
+    # Only the current segment and one chunk are held in memory
+    buffer = ""
+    start = 0
+    searched = 0
+    eof = False
+    while True:
+        separator = buffer.find("\n\n", searched)
+        if separator == -1:
+            if eof:
+                yield line, buffer[start:]
+                return
+            remainder = buffer[start:]
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            # Everything but the last character of remainder is known to hold no separator
+            searched = max(0, len(remainder) - 1)
+            buffer = remainder + chunk
+            start = 0
+            continue
+        segment = buffer[start:separator]
+        yield line, segment
+        line += segment.count("\n") + 2
+        start = searched = separator + 2
+
+
+def iter_blocks(f, line=1, chunk_size=CHUNK_SIZE):
+    # Yield (line, block) for the blocks markdown_to_blocks would return for
+    # the rest of the file, as they complete
+    for line, segment in iter_raw_blocks(f, line, chunk_size):
+        if segment == "":
+            continue
+        block = segment.strip()
+        leading = len(segment) - len(segment.lstrip())
+        yield line + segment.count("\n", 0, leading), block
+
+
+def scan_title(f):
+    # Find the first "# " heading in the rest of an open page a line at a
+    # time, leaving the file where it was
+    position = f.tell()
+    title = None
+    while True:
+        line = f.readline()
+        if not line:
+            break
+        if line.startswith("# "):
+            title = line[2:].strip()
+            break
+    f.seek(position)
+    return title
+
+
+class StreamedBody:
+    # Stands in for a page body's node tree in a template: render_to reads
+    # the markdown a block at a time and writes each block as soon as it is
+    # converted, so memory stays proportional to the largest block
+    # Links, search terms and partials are collected while rendering, and
+    # reference definitions in a pass over the file before it
+    def __init__(self, f, line, partials_dir, deps):
+        self.f = f
+        self.line = line
+        self.partials_dir = partials_dir
+        self.deps = deps
+        self.links = []
+        self.terms = {}
+
+    def expanded_blocks(self):
+        # Yield (line, text, included) for each block, with its includes
+        # expanded; included maps lines of text back to lines of the block
+        for line, block in iter_blocks(self.f, self.line):
+            included = []
+            if "{{" in block:
+                block, used = expand_includes(block, self.partials_dir, included=included)
+                self.deps |= used
+            yield line, block, included
+
+    def read_references(self):
+        # Collect the reference definitions of the whole page, leaving the file where it was
+        position = self.f.tell()
+        references = {}
+        for line, text, included in self.expanded_blocks():
+            for block in markdown_to_blocks(text) if included else [text]:
+                if block.startswith("[") and block_to_block_type(block) == "reference":
+                    add_references(block, references)
+        self.f.seek(position)
+        return references
+
+    def render_to(self, fp):
+        references = self.read_references()
+        fp.write("<div>")
+        for line, text, included in self.expanded_blocks():
+            if text == "" and not included:
+                # A whitespace-only block; markdown_to_html_node would find
+                # no block in it, but the whole-page path converts it
+                block_to_html_node(text, block_to_block_type(text)).render_to(fp)
+                continue
+            links = []
+            texts = []
+            for node in markdown_to_html_node(text, links, texts, references).children:
+                node.render_to(fp)
+            for block_line, url in links:
+                self.links.append([line + source_line(block_line, included) - 1, url])
+            for term, count in page_terms(texts).items():
+                self.terms[term] = self.terms.get(term, 0) + count
+        fp.write("</div>")
+
+    def to_html(self):
+        out = io.StringIO()
+        self.render_to(out)
+        return out.getvalue()
@@ -0,0 +1,123 @@
+import os
+import shutil
+
+from discovery import walk_files
+from manifest import hash_file, remove_empty_dirs
+from output import OutputFile
+
+
+def files_match(source_stat, dest_path, use_hash, source_file):
+    # Check whether the destination already holds the same file as the source
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != source_stat.st_size:
+        return False
+    if dest_stat.st_mtime_ns == source_stat.st_mtime_ns:
+        return True
+    if use_hash and hash_file(source_file) == hash_file(dest_path):
+        # Same bytes, so only bring the mtime in line for the next quick check
+        os.utime(dest_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        return True
+    return False
+
+
+def sync_files(source, destination, previous=None, use_hash=False, rename=None, rewrite=None, reserved=()):
+    # Copy new and changed files from source to destination
+    # Files are compared by size and mtime, and optionally by content hash
+    # previous maps the relative paths synced last time to their sizes, so
+    # outputs whose source vanished can be removed without touching other
+    # files in destination
+    # rename(relative_path, source_file, source_stat) may give a file a
+    # different name in destination; synced and previous use those names
+    # rewrite(relative_path, html) returns what to write for an HTML file in
+    # place of a copy; those files are written after every other file, so
+    # the rewrite sees the names all of them were given
+    # reserved holds relative paths in destination that something else, like
+    # a page, writes; files there are neither copied nor removed
+    stats = {
+        "copied": 0,
+        "copied_bytes": 0,
+        "skipped": 0,
+        "skipped_bytes": 0,
+        "removed": 0,
+        "removed_bytes": 0,
+    }
+    synced = {}
+    os.makedirs(destination, exist_ok=True)
+    made_dirs = {destination}
+    rewritten = []
+
+    for relative_path, entry in walk_files(source):
+        source_file = entry.path
+        source_stat = entry.stat()
+        if rename is not None:
+            relative_path = rename(relative_path, source_file, source_stat)
+        if relative_path in reserved:
+            print(f"Not copying {source_file}: a page is written to {relative_path}")
+            continue
+        destination_file = os.path.join(destination, relative_path)
+        synced[relative_path] = source_stat.st_size
+        if rewrite is not None and relative_path.endswith(".html"):
+            rewritten.append((relative_path, source_file, source_stat))
+            continue
+
+        if files_match(source_stat, destination_file, use_hash, source_file):
+            stats["skipped"] += 1
+            stats["skipped_bytes"] += source_stat.st_size
+            continue
+        destination_dir = os.path.dirname(destination_file)
+        if destination_dir not in made_dirs:
+            os.makedirs(destination_dir, exist_ok=True)
+            made_dirs.add(destination_dir)
+        shutil.copy2(source_file, destination_file)
+        stats["copied"] += 1
+        stats["copied_bytes"] += source_stat.st_size
+        print(f"Copied {source_file} to {destination_file}")
+
+    for relative_path, source_file, source_stat in rewritten:
+        destination_file = os.path.join(destination, relative_path)
+        destination_dir = os.path.dirname(destination_file)
+        if destination_dir not in made_dirs:
+            os.makedirs(destination_dir, exist_ok=True)
+            made_dirs.add(destination_dir)
+        with open(source_file, "r") as f:
+            html = rewrite(relative_path, f.read())
+        # Unchanged outputs are left alone, so they count as skipped
+        output = OutputFile(destination_file)
+        with output as d:
+            d.write(html)
+        if output.changed:
+            stats["copied"] += 1
+            stats["copied_bytes"] += source_stat.st_size
+            print(f"Rewrote {source_file} to {destination_file}")
+        else:
+            stats["skipped"] += 1
+            stats["skipped_bytes"] += source_stat.st_size
+
+    for relative_path in previous or {}:
+        if relative_path in synced or relative_path in reserved:
+            continue
+        destination_file = os.path.join(destination, relative_path)
+        if os.path.exists(destination_file):
+            stats["removed_bytes"] += os.path.getsize(destination_file)
+            os.remove(destination_file)
+            remove_empty_dirs(os.path.dirname(destination_file), destination)
+            print(f"Removed {destination_file}")
+        stats["removed"] += 1
+
+    print(
+        f"Static: {stats['copied']} copied ({format_bytes(stats['copied_bytes'])}), "
+        f"{stats['skipped']} skipped ({format_bytes(stats['skipped_bytes'])}), "
+        f"{stats['removed']} removed ({format_bytes(stats['removed_bytes'])})"
+    )
+    return synced, stats
+
+
+def format_bytes(size):
+    # Format a byte count for humans
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
@@ -0,0 +1,124 @@
+import os
+import re
+
+import assets
+from assets import rewrite_references
+from partials import expand_includes
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+LAYOUT_FILE = ".layout"
+
+template_cache = {}
+
+
+class Template:
+    # A template compiled into static chunks with named slots between them
+    # chunks always has one more item than slots, so chunks[i] comes before
+    # slots[i] and the last chunk closes the page
+    def __init__(self, source, deps=None):
+        self.deps = deps or set()
+        self.chunks = []
+        self.slots = []
+        self.placeholders = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            self.chunks.append(source[position:match.start()])
+            self.slots.append(match.group(1))
+            self.placeholders.append(match.group(0))
+            position = match.end()
+        self.chunks.append(source[position:])
+
+    def parts(self, values):
+        # Yield the pieces of the page in order, leaving unknown placeholders as they are
+        # A value is either a string or a node that can render itself
+        yield self.chunks[0]
+        for i in range(len(self.slots)):
+            yield values.get(self.slots[i], self.placeholders[i])
+            yield self.chunks[i + 1]
+
+    def render(self, values):
+        return "".join(
+            part if isinstance(part, str) else part.to_html() for part in self.parts(values)
+        )
+
+    def render_to(self, fp, values):
+        # Write the page straight to a file without assembling it in memory
+        for part in self.parts(values):
+            if isinstance(part, str):
+                fp.write(part)
+            else:
+                part.render_to(fp)
+
+    def __repr__(self):
+        return f"Template(slots: {self.slots})"
+
+
+def compile_template(source, partials_dir=None):
+    # Compile a template, first expanding its includes when partials_dir is given
+    # and pointing asset references at their fingerprinted names
+    deps = None
+    if partials_dir is not None:
+        source, deps = expand_includes(source, partials_dir)
+    # Templates are shared by pages in every directory, so their relative
+    # references resolve against the site root
+    return Template(rewrite_references(source, "/"), deps)
+
+
+def file_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_template(path, partials_dir="partials"):
+    # Load and compile a template, reusing the compiled form until the file
+    # or one of the partials it includes changes, or the asset names do
+    cached = template_cache.get(path)
+    if (
+        cached is not None
+        and cached[2] == assets.asset_salt
+        and all(file_key(key_path) == key for key_path, key in cached[0])
+    ):
+        return cached[1]
+    key = file_key(path)
+    with open(path, "r") as t:
+        template = compile_template(t.read(), partials_dir)
+    keys = [(path, key)] + [(dep, file_key(dep)) for dep in sorted(template.deps)]
+    template_cache[path] = (keys, template, assets.asset_salt)
+    return template
+
+
+def clear_template_cache():
+    template_cache.clear()
+
+
+def directory_layout(dir_path, dir_path_content, cache):
+    # Find the layout name set by the nearest .layout file between dir_path and the content root
+    if dir_path in cache:
+        return cache[dir_path]
+    layout = None
+    layout_file = os.path.join(dir_path, LAYOUT_FILE)
+    if os.path.exists(layout_file):
+        with open(layout_file, "r") as f:
+            layout = f.read().strip() or None
+    if layout is None:
+        parent = os.path.dirname(dir_path)
+        if os.path.abspath(dir_path) != os.path.abspath(dir_path_content) and parent != dir_path:
+            layout = directory_layout(parent, dir_path_content, cache)
+    cache[dir_path] = layout
+    return layout
+
+
+def select_layout(markdown_path, dir_path_content, meta, default_template, layouts_dir, cache):
+    # Pick the template for a page: front matter first, then the directory, then the default
+    layout = meta.get("layout")
+    if layout is None:
+        layout = directory_layout(os.path.dirname(markdown_path), dir_path_content, cache)
+    if layout is None or layout == "default":
+        return default_template
+    layout_path = os.path.join(layouts_dir, layout + ".html")
+    if not os.path.exists(layout_path):
+        raise ValueError(f"Unknown layout '{layout}' for {markdown_path}")
+    return layout_path
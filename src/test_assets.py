@@ -0,0 +1,131 @@
+import json
+import os
+import unittest
+
+from assets import asset_url, fingerprinted_name, rewrite_references, set_asset_urls, set_page_route
+from main import copy_files
+from manifest import hash_file, new_manifest
+from sitetest import SiteTestCase
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+class TestAssetUrls(unittest.TestCase):
+    def setUp(self):
+        set_asset_urls({"/index.css": "/index.0123456789.css", "/images/a.png": "/images/a.abcdef0123.png"})
+
+    def tearDown(self):
+        set_asset_urls({})
+        set_page_route("/index.html")
+
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name("images/a.png", "abcdef0123456789"), "images/a.abcdef0123.png")
+
+    def test_asset_url(self):
+        self.assertEqual(asset_url("/index.css"), "/index.0123456789.css")
+        self.assertEqual(asset_url("index.css?v=2#top"), "index.0123456789.css?v=2#top")
+        self.assertEqual(asset_url("/other.css"), "/other.css")
+        self.assertEqual(asset_url("https://example.com/index.css"), "https://example.com/index.css")
+
+    def test_relative_urls_resolve_against_page(self):
+        set_asset_urls({"/index.css": "/index.0123456789.css", "/blog/pic.png": "/blog/pic.abcdef0123.png"})
+        set_page_route("/blog/post.html")
+        self.assertEqual(asset_url("pic.png"), "pic.abcdef0123.png")
+        self.assertEqual(asset_url("./pic.png#x"), "pic.abcdef0123.png#x")
+        self.assertEqual(asset_url("../index.css"), "../index.0123456789.css")
+        self.assertEqual(asset_url("index.css"), "index.css")
+        self.assertEqual(asset_url("/blog/pic.png"), "/blog/pic.abcdef0123.png")
+
+    def test_rewrite_references(self):
+        self.assertEqual(
+            rewrite_references('<link href="/index.css"><img src=\'/images/a.png\'><a href="/x">'),
+            '<link href="/index.0123456789.css"><img src=\'/images/a.abcdef0123.png\'><a href="/x">',
+        )
+
+    def test_text_nodes(self):
+        node = text_node_to_html_node(TextNode("A", TextType.IMAGE, "/images/a.png"))
+        self.assertEqual(node.props["src"], "/images/a.abcdef0123.png")
+        node = text_node_to_html_node(TextNode("css", TextType.LINK, "/index.css"))
+        self.assertEqual(node.props["href"], "/index.0123456789.css")
+
+    def test_off_leaves_urls(self):
+        set_asset_urls({})
+        self.assertEqual(asset_url("/index.css"), "/index.css")
+
+
+class TestFingerprintBuild(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "a.png"), "png")
+        self.write(os.path.join(self.static, "robots.html"), "<p>keep</p>")
+        self.write(os.path.join(self.static, "blog", "pic.png"), "blog png")
+        self.write(os.path.join(self.static, "blog", "about.html"), '<link href="../index.css"><img src="pic.png">')
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n![p](pic.png)")
+        self.write(self.template, '<link href="/index.css">{{ Content }}')
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![A](/images/a.png)")
+        self.manifest = new_manifest()
+
+    def tearDown(self):
+        set_asset_urls({})
+        super().tearDown()
+
+    def build(self, fingerprint=True):
+        self.static_stats = self.quietly(copy_files, self.static, self.public, self.manifest, fingerprint=fingerprint)
+        return self.generate(self.manifest)
+
+    def hashed(self, *parts):
+        digest = hash_file(os.path.join(self.static, *parts))
+        return fingerprinted_name("/".join(parts), digest)
+
+    def test_build_renames_and_rewrites(self):
+        self.build()
+        css = self.hashed("index.css")
+        png = self.hashed("images", "a.png")
+        self.assertTrue(os.path.exists(os.path.join(self.public, css)))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "robots.html")))
+        html = self.read("index.html")
+        self.assertIn(f'href="/{css}"', html)
+        self.assertIn(f'src="/{png}"', html)
+        with open(os.path.join(self.public, "asset-manifest.json")) as f:
+            self.assertEqual(json.load(f)["/index.css"], f"/{css}")
+        self.assertIn(f"/{css}\n  Cache-Control: public, max-age=31536000, immutable\n", self.read("_headers"))
+
+    def test_relative_references_in_subdirectories(self):
+        self.build()
+        pic = os.path.basename(self.hashed("blog", "pic.png"))
+        self.assertIn(f'src="{pic}"', self.read("blog", "post.html"))
+        self.assertEqual(self.read("blog", "about.html"), f'<link href="../{self.hashed("index.css")}"><img src="{pic}">')
+        # The rewritten copy is left alone while its source is unchanged
+        self.build()
+        self.assertEqual(self.static_stats["copied"], 0)
+
+    def test_unchanged_build_keeps_asset_manifest_and_headers(self):
+        self.build()
+        paths = [os.path.join(self.public, name) for name in ("asset-manifest.json", "_headers")]
+        for path in paths:
+            os.utime(path, ns=(0, 0))
+        self.build()
+        for path in paths:
+            self.assertEqual(os.stat(path).st_mtime_ns, 0)
+
+    def test_asset_change_rebuilds_pages(self):
+        self.build()
+        old = self.hashed("index.css")
+        self.write(os.path.join(self.static, "index.css"), "body { color: red }")
+        self.assertEqual(self.build()["rebuilt"], 2)
+        self.assertFalse(os.path.exists(os.path.join(self.public, old)))
+        self.assertIn(self.hashed("index.css"), self.read("index.html"))
+
+    def test_turning_off_restores_names(self):
+        self.build()
+        self.build(fingerprint=False)
+        self.assertEqual(
+            sorted(os.listdir(self.public)), ["blog", "images", "index.css", "index.html", "robots.html"]
+        )
+        self.assertIn('href="../index.css"', self.read("blog", "about.html"))
+        self.assertIn('href="/index.css"', self.read("index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import contextlib
+import io
+import unittest
+
+from benchmark.__main__ import compare
+from benchmark.corpus import CORPORA, generate_corpus
+from delimiter import markdown_to_html_node
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpus_is_reproducible(self):
+        self.assertEqual(generate_corpus("blog", 0.01), generate_corpus("blog", 0.01))
+        self.assertNotEqual(generate_corpus("blog", 0.01), generate_corpus("blog", 0.01, seed=2))
+
+    def test_corpora_render(self):
+        for name in CORPORA:
+            for path, markdown in generate_corpus(name, 0.001)[:5]:
+                markdown_to_html_node(markdown).to_html()
+
+    def test_compare_flags_regressions(self):
+        baseline = {"a": 1.0, "b": 1.0, "c": 0.001}
+        results = {"a": 1.05, "b": 1.5, "c": 0.01, "d": 2.0}
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(compare(results, baseline, 0.1, min_time=0.005), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import unittest
+from unittest import mock
+
+from cache import ParseCache
+from manifest import new_manifest
+from sitetest import SiteTestCase
+
+
+class TestParseCache(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = ParseCache(os.path.join(self.root, "cache"))
+
+    def test_put_and_get(self):
+        key = self.cache.key("# Hi")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, "<div><h1>Hi</h1></div>")
+        self.assertEqual(self.cache.get(key), "<div><h1>Hi</h1></div>")
+
+    def test_key_depends_on_markdown_version_and_salt(self):
+        key = self.cache.key("# Hi")
+        self.assertNotEqual(key, self.cache.key("# Ho"))
+        self.assertNotEqual(key, self.cache.key("# Hi", salt="escape"))
+        with mock.patch("cache.PARSER_VERSION", "next"):
+            self.assertNotEqual(key, self.cache.key("# Hi"))
+
+    def test_evict_least_recently_used(self):
+        self.cache.max_bytes = 250
+        keys = [self.cache.key(str(i)) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, "x" * 100)
+            os.utime(self.cache.path(key), ns=(i * 10**9, i * 10**9))
+        self.cache.get(keys[0])
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_template_change_skips_parsing(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nSome **text**")
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        manifest = new_manifest()
+        self.generate(manifest, cache=self.cache)
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        with mock.patch("pages.markdown_to_html_node", side_effect=AssertionError("parsed")):
+            stats = self.generate(manifest, cache=self.cache)
+        self.assertEqual(stats["rebuilt"], 1)
+        self.assertEqual(self.read("index.html"), "<h1>Home</h1><div><h1>Home</h1><p>Some <b>text</b></p></div>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import gzip
+import os
+import unittest
+
+from compress import compress_changed, compress_outputs, remove_compressed
+from manifest import new_manifest
+from sitetest import SiteTestCase
+
+
+class TestCompress(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = os.path.join(self.public, "blog", "post.html")
+        self.write(self.page, "<p>hello world</p>" * 200)
+        self.write(os.path.join(self.public, "small.css"), "body {}")
+        self.write(os.path.join(self.public, "logo.png"), "x" * 4096)
+        self.manifest = new_manifest()
+
+    def compress(self, jobs=1):
+        return self.quietly(compress_outputs, self.public, min_size=1024, jobs=jobs, manifest=self.manifest)
+
+    def test_writes_gzip_sibling(self):
+        stats = self.compress()
+        self.assertEqual(stats["files"], 1)
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>hello world</p>" * 200)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "small.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "logo.png.gz")))
+
+    def test_unchanged_files_are_skipped(self):
+        self.compress()
+        self.assertEqual(self.compress()["written"], 0)
+
+    def test_changed_file_is_recompressed(self):
+        self.compress()
+        self.write(self.page, "<p>changed</p>" * 200)
+        self.assertGreater(self.compress()["written"], 0)
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>changed</p>" * 200)
+
+    def test_orphaned_sibling_is_removed(self):
+        self.compress()
+        os.remove(self.page)
+        self.assertGreater(self.compress()["removed"], 0)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_other_compressed_files_are_kept(self):
+        # Shipped files, even ones named like a sibling of a missing output
+        shipped = [os.path.join(self.public, name) for name in ("data.tar.gz", "data.json.gz", "old.html.zst")]
+        for path in shipped:
+            self.write(path, "not really compressed")
+        self.assertEqual(self.compress()["removed"], 0)
+        remove_compressed(self.manifest)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        for path in shipped:
+            self.assertTrue(os.path.exists(path))
+
+    def test_turning_off_removes_siblings(self):
+        self.compress()
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+        remove_compressed(self.manifest)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertNotIn("compressed", self.manifest)
+
+    def test_compress_changed_touches_only_given_outputs(self):
+        other = os.path.join(self.public, "other.html")
+        self.write(other, "<p>other</p>" * 200)
+        stats = compress_changed([self.page, os.path.join(self.public, "logo.png")], min_size=1024)
+        self.assertEqual(stats["written"], 1)
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+        self.assertFalse(os.path.exists(other + ".gz"))
+        os.remove(self.page)
+        self.assertGreater(compress_changed([self.page], min_size=1024)["removed"], 0)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_compress_changed_keeps_the_record(self):
+        shipped = os.path.join(self.public, "gone.html.gz")
+        self.write(shipped, "shipped")
+        compress_changed([self.page], min_size=1024, manifest=self.manifest)
+        self.assertIn(self.page + ".gz", self.manifest["compressed"])
+        os.remove(self.page)
+        compress_changed([self.page, os.path.join(self.public, "gone.html")], min_size=1024, manifest=self.manifest)
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+        self.assertTrue(os.path.exists(shipped))
+        self.assertEqual(self.manifest["compressed"], [])
+
+    def test_parallel_matches_serial(self):
+        for i in range(4):
+            self.write(os.path.join(self.public, f"{i}.js"), f"var x{i} = 1;\n" * 200)
+        self.compress(jobs=2)
+        for i in range(4):
+            with gzip.open(os.path.join(self.public, f"{i}.js.gz"), "rt") as f:
+                self.assertEqual(f.read(), f"var x{i} = 1;\n" * 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from discovery import scan_tree, tree_files, walk_files
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for path in ("index.md", "blog/post.md", "blog/img.png", "blog/deep/x.md", ".git/HEAD", ".git/objects/ab"):
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                f.write(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def age(self, *parts):
+        # Make a directory look older than the racy window
+        path = os.path.join(self.root, *parts)
+        os.utime(path, ns=(0, 10**9))
+
+    def test_walk_files_prunes_ignored_dirs(self):
+        with mock.patch("discovery.os.scandir", wraps=os.scandir) as scandir:
+            found = sorted(relative_path for relative_path, entry in walk_files(self.root))
+        self.assertEqual(found, ["blog/deep/x.md", "blog/img.png", "blog/post.md", "index.md"])
+        self.assertNotIn(os.path.join(self.root, ".git"), [call.args[0] for call in scandir.call_args_list])
+
+    def test_walk_files_suffix_and_entries(self):
+        found = {relative_path: entry for relative_path, entry in walk_files(self.root, ".md")}
+        self.assertEqual(sorted(found), ["blog/deep/x.md", "blog/post.md", "index.md"])
+        self.assertEqual(found["index.md"].stat().st_size, len("index.md"))
+
+    def test_scan_tree(self):
+        tree = scan_tree(self.root)
+        self.assertEqual(sorted(tree), ["", "blog", "blog/deep"])
+        self.assertEqual(list(tree_files(tree, ".md")), ["index.md", "blog/post.md", "blog/deep/x.md"])
+
+    def test_unchanged_dirs_are_not_listed_again(self):
+        for parts in ((), ("blog",), ("blog", "deep")):
+            self.age(*parts)
+        tree = scan_tree(self.root)
+        with open(os.path.join(self.root, "blog", "deep", "new.md"), "w") as f:
+            f.write("new")
+        with mock.patch("discovery.os.scandir", wraps=os.scandir) as scandir:
+            tree = scan_tree(self.root, tree)
+        self.assertEqual([call.args[0] for call in scandir.call_args_list], [os.path.join(self.root, "blog", "deep")])
+        self.assertIn("blog/deep/new.md", list(tree_files(tree)))
+
+    def test_recent_dirs_are_listed_again(self):
+        tree = scan_tree(self.root)
+        self.assertIsNone(tree[""][0])
+        with mock.patch("discovery.os.scandir", wraps=os.scandir) as scandir:
+            scan_tree(self.root, tree)
+        self.assertEqual(scandir.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
+import io
 import unittest
-from htmlnode import LeafNode, ParentNode, HTMLNode
+from htmlnode import LeafNode, ParentNode, HTMLNode, escape_attribute, escape_text
+from textnode import TextNode, TextType
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -49,6 +51,12 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(p, What a strange world, children: None, {'class': 'primary'})",
         )
 
+    def test_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("div", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(LeafNode("b", "x", {"a": "1"}), LeafNode("b", "x", {"a": "1"}))
+        self.assertNotEqual(ParentNode("div", []), LeafNode("div", ""))
+
     def test_to_html_no_children(self):
         node = LeafNode("p", "Hello, world!")
         self.assertEqual(node.to_html(), "<p>Hello, world!</p>")
@@ -101,6 +109,53 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_render_to_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [TextNode("Some ", TextType.TEXT), TextNode("bold", TextType.BOLD)]),
+                ParentNode("ul", [ParentNode("li", [LeafNode("a", "link", {"href": "/x"})])]),
+                HTMLNode("section", None, [LeafNode(None, "raw")], {"class": "note"}),
+            ],
+        )
+        out = io.StringIO()
+        node.render_to(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual("".join(node.iter_html()), node.to_html())
+
+    def test_render_to_flushes_large_trees(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, str(i))]) for i in range(5000)])
+        out = io.StringIO()
+        node.render_to(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_render_to_no_tag(self):
+        with self.assertRaises(ValueError):
+            ParentNode(None, []).render_to(io.StringIO())
+
+    def test_escape_fast_path_returns_same_object(self):
+        text = "Plain text, nothing to escape"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
+    def test_escape(self):
+        self.assertEqual(escape_text('a < b && "c" > d'), 'a &lt; b &amp;&amp; "c" &gt; d')
+        self.assertEqual(escape_attribute('say "hi" & <go>'), "say &quot;hi&quot; &amp; &lt;go&gt;")
+        self.assertEqual(escape_text("&lt;"), "&amp;lt;")
+
+    def test_nodes_escape(self):
+        node = ParentNode("p", [
+            LeafNode(None, "1 < 2"),
+            LeafNode("a", "Q&A", {"href": '/search?q="x"&y=1'}),
+        ], {"title": "a<b"})
+        expected = '<p title="a&lt;b">1 &lt; 2<a href="/search?q=&quot;x&quot;&amp;y=1">Q&amp;A</a></p>'
+        self.assertEqual(node.to_html(), expected)
+        self.assertEqual("".join(node.iter_html()), expected)
+        out = io.StringIO()
+        node.render_to(out)
+        self.assertEqual(out.getvalue(), expected)
+        self.assertEqual(HTMLNode("b", "<x>").to_html(), "<b>&lt;x&gt;</b>")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,163 @@
+import contextlib
+import io
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from cache import ParseCache
+from images import image_size, scan_images, set_image_info
+from manifest import new_manifest
+from pages import generate_pages_recursive
+from textnode import TextNode, TextType, text_node_to_html_node
+
+
+def png_bytes(width, height):
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    rows = b"".join(b"\x00" + b"\x00" * width for _ in range(height))
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size_of("a.png", png_bytes(3, 2)), (3, 2))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of("a.gif", b"GIF89a" + struct.pack("<HH", 640, 480) + b"\x00" * 20), (640, 480))
+
+    def test_jpeg(self):
+        self.assertEqual(self.size_of("a.jpg", jpeg_bytes(1024, 768)), (1024, 768))
+
+    def test_webp(self):
+        lossy = b"RIFF\x00\x00\x00\x00WEBPVP8 " + b"\x00" * 10 + struct.pack("<HH", 320, 200)
+        self.assertEqual(self.size_of("a.webp", lossy), (320, 200))
+        bits = (320 - 1) | ((200 - 1) << 14)
+        lossless = b"RIFF\x00\x00\x00\x00WEBPVP8L" + b"\x00" * 5 + struct.pack("<I", bits) + b"\x00" * 8
+        self.assertEqual(self.size_of("b.webp", lossless), (320, 200))
+        extended = b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x00" * 8 + (319).to_bytes(3, "little") + (199).to_bytes(3, "little")
+        self.assertEqual(self.size_of("c.webp", extended), (320, 200))
+
+    def test_unknown(self):
+        self.assertIsNone(self.size_of("a.png", b"not an image"))
+
+
+class TestImageAttributes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        os.makedirs(os.path.join(self.static, "images"))
+        with open(os.path.join(self.static, "images", "big.png"), "wb") as f:
+            f.write(png_bytes(40, 30))
+        with open(os.path.join(self.static, "images", "dot.gif"), "wb") as f:
+            f.write(b"GIF89a" + struct.pack("<HH", 1, 1) + b"\x00" * 20)
+        info, self.state = scan_images(self.static, inline_max_bytes=64)
+        set_image_info(info)
+
+    def tearDown(self):
+        set_image_info(None)
+        self.tmp.cleanup()
+
+    def test_dimensions_and_lazy_loading(self):
+        node = TextNode("Big", TextType.IMAGE, "/images/big.png")
+        self.assertEqual(
+            node.to_html(),
+            '<img src="/images/big.png" alt="Big" width="40" height="30" loading="lazy" decoding="async">',
+        )
+        self.assertEqual(text_node_to_html_node(node).props, {
+            "src": "/images/big.png", "alt": "Big", "width": "40", "height": "30",
+            "loading": "lazy", "decoding": "async",
+        })
+
+    def test_small_image_is_inlined(self):
+        html = TextNode("Dot", TextType.IMAGE, "images/dot.gif").to_html()
+        self.assertTrue(html.startswith('<img src="data:image/gif;base64,R0lGODlh'))
+        self.assertIn('width="1" height="1"', html)
+        self.assertNotIn("loading", html)
+
+    def test_unknown_image_is_lazy(self):
+        self.assertEqual(
+            TextNode("X", TextType.IMAGE, "https://example.com/x.png").to_html(),
+            '<img src="https://example.com/x.png" alt="X" loading="lazy" decoding="async">',
+        )
+
+    def test_rescan_reuses_known_sizes(self):
+        with open(os.path.join(self.static, "images", "big.png"), "r+b") as f:
+            f.seek(16)
+            f.write(struct.pack(">II", 99, 99))
+        stat = os.stat(os.path.join(self.static, "images", "big.png"))
+        known = dict(self.state)
+        known[os.path.join("images", "big.png")][:2] = [stat.st_mtime_ns, stat.st_size]
+        info, state = scan_images(self.static, 64, known)
+        self.assertEqual(info["/images/big.png"]["width"], 40)
+
+    def test_off_by_default(self):
+        set_image_info(None)
+        self.assertEqual(
+            TextNode("Big", TextType.IMAGE, "/images/big.png").to_html(),
+            '<img src="/images/big.png" alt="Big">',
+        )
+
+    def test_size_change_rebuilds_pages(self):
+        content = os.path.join(self.tmp.name, "content")
+        public = os.path.join(self.tmp.name, "public")
+        template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(content)
+        with open(template, "w") as f:
+            f.write("{{ Content }}")
+        with open(os.path.join(content, "index.md"), "w") as f:
+            f.write("![Big](/images/big.png)")
+        manifest = new_manifest()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template, public, manifest)
+            self.assertEqual(generate_pages_recursive(content, template, public, manifest)["rebuilt"], 0)
+            info = scan_images(self.static, 64)[0]
+            info["/images/big.png"] = {"width": 80, "height": 60}
+            set_image_info(info)
+            self.assertEqual(generate_pages_recursive(content, template, public, manifest)["rebuilt"], 1)
+        with open(os.path.join(public, "index.html")) as f:
+            self.assertIn('width="80" height="60"', f.read())
+
+    def test_relative_urls_resolve_against_page(self):
+        content = os.path.join(self.tmp.name, "content")
+        public = os.path.join(self.tmp.name, "public")
+        template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(content, "images"))
+        with open(template, "w") as f:
+            f.write("{{ Content }}")
+        # The same markdown in two directories, sharing one parse cache
+        for path in ("index.md", os.path.join("images", "gallery.md")):
+            with open(os.path.join(content, path), "w") as f:
+                f.write("![Big](big.png)")
+        cache = ParseCache(os.path.join(self.tmp.name, "cache"), 1024 * 1024)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content, template, public, cache=cache)
+        with open(os.path.join(public, "images", "gallery.html")) as f:
+            self.assertIn('src="big.png" alt="Big" width="40" height="30"', f.read())
+        with open(os.path.join(public, "index.html")) as f:
+            self.assertNotIn("width", f.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import unittest
+from unittest import mock
+
+import pages
+from delimiter import markdown_to_html_node
+from cache import ParseCache
+from links import find_broken_links, link_exists, link_target
+from main import copy_files
+from manifest import new_manifest
+from sitetest import SiteTestCase
+
+
+class TestLinks(unittest.TestCase):
+    def test_markdown_links_have_lines(self):
+        links = []
+        markdown_to_html_node(
+            "# T\n\nSee [a](/a) and\n![i](/i.png)\n\n- x\n- [b](b)\n\n```\n[c](/c)\n```",
+            links,
+        )
+        self.assertEqual(links, [[3, "/a"], [4, "/i.png"], [7, "b"]])
+
+    def test_link_target(self):
+        self.assertEqual(link_target("/a.html#top", "/blog/post.html"), "/a.html")
+        self.assertEqual(link_target("../img/x.png", "/blog/post.html"), "/img/x.png")
+        self.assertEqual(link_target("other", "/blog/post.html"), "/blog/other")
+        self.assertEqual(link_target("/docs/", "/index.html"), "/docs/")
+        self.assertIsNone(link_target("https://example.com/", "/index.html"))
+        self.assertIsNone(link_target("#section", "/index.html"))
+        self.assertIsNone(link_target("mailto:a@b.c", "/index.html"))
+
+    def test_link_exists(self):
+        routes = {"/index.html", "/blog/post.html", "/docs/index.html"}
+        for target in ("/", "/blog/post.html", "/blog/post", "/docs/", "/docs"):
+            self.assertTrue(link_exists(target, routes), target)
+        self.assertFalse(link_exists("/blog/missing", routes))
+
+
+class TestLinkIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.static, "logo.png"), "png")
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "---\ntitle: Home\n---\n# Home\n\n[post](/blog/post) ![logo](logo.png)\n\n[gone](/nope.html)",
+        )
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\n[home](../index.html)\n[bad](missing)")
+        self.manifest = new_manifest()
+
+    def build(self, cache=None):
+        self.quietly(copy_files, self.static, self.public, self.manifest)
+        self.generate(self.manifest, cache=cache, partials_dir=self.partials)
+        return find_broken_links(self.manifest, self.public)
+
+    def test_broken_links_are_reported_with_lines(self):
+        broken, checked = self.build()
+        self.assertEqual(checked, 5)
+        self.assertEqual(broken, [
+            (os.path.join(self.content, "blog", "post.md"), 4, "missing"),
+            (os.path.join(self.content, "index.md"), 8, "/nope.html"),
+        ])
+
+    def test_reused_pages_keep_their_links(self):
+        self.build()
+        self.write(os.path.join(self.content, "nope.md"), "# Now it exists")
+        broken, checked = self.build()
+        self.assertEqual(broken, [(os.path.join(self.content, "blog", "post.md"), 4, "missing")])
+
+    def test_cached_pages_keep_their_links(self):
+        cache = ParseCache(os.path.join(self.root, "cache"))
+        first = self.build(cache)
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.assertEqual(self.build(cache), first)
+
+    def test_lines_below_includes_are_source_lines(self):
+        self.write(os.path.join(self.partials, "nav.md"), "- [one](/one.html)\n- two\n- three\n- four")
+        self.write(
+            os.path.join(self.content, "index.md"),
+            "{{ include nav.md }}\n\nText\n\nSee [gone](/nope.html)\n\n{{ include nav.md }} [also](/gone.html)",
+        )
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        expected = [
+            (os.path.join(self.content, "index.md"), 1, "/one.html"),
+            (os.path.join(self.content, "index.md"), 5, "/nope.html"),
+            (os.path.join(self.content, "index.md"), 7, "/one.html"),
+            (os.path.join(self.content, "index.md"), 7, "/gone.html"),
+        ]
+        self.assertEqual(self.build()[0], expected)
+        self.manifest = new_manifest()
+        with mock.patch.object(pages, "STREAM_MIN_BYTES", 0):
+            self.assertEqual(self.build()[0], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import unittest
+
+from manifest import load_manifest, save_manifest, new_manifest
+from sitetest import SiteTestCase
+
+
+class TestManifest(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello")
+
+    def test_load_missing(self):
+        self.assertEqual(load_manifest(os.path.join(self.root, "nope.json")), new_manifest())
+
+    def test_save_and_load(self):
+        path = os.path.join(self.root, "manifest.json")
+        manifest = new_manifest()
+        manifest["pages"]["a.md"] = {"dest": "a.html"}
+        save_manifest(manifest, path)
+        self.assertEqual(load_manifest(path), manifest)
+
+    def test_second_build_reuses_pages(self):
+        manifest = new_manifest()
+        self.assertEqual(self.generate(manifest), {"rebuilt": 2, "reused": 0, "removed": 0})
+        self.assertEqual(self.generate(manifest), {"rebuilt": 0, "reused": 2, "removed": 0})
+
+    def test_edited_page_is_rebuilt(self):
+        manifest = new_manifest()
+        self.generate(manifest)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        self.assertEqual(self.generate(manifest), {"rebuilt": 1, "reused": 1, "removed": 0})
+        self.assertIn("Changed", self.read("index.html"))
+
+    def test_template_change_rebuilds_all(self):
+        manifest = new_manifest()
+        self.generate(manifest)
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(self.generate(manifest), {"rebuilt": 2, "reused": 0, "removed": 0})
+
+    def test_deleted_page_output_is_removed(self):
+        manifest = new_manifest()
+        self.generate(manifest)
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.assertEqual(self.generate(manifest), {"rebuilt": 0, "reused": 1, "removed": 1})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    def test_modified_output_is_rebuilt(self):
+        manifest = new_manifest()
+        self.generate(manifest)
+        self.write(os.path.join(self.public, "index.html"), "tampered")
+        self.assertEqual(self.generate(manifest), {"rebuilt": 1, "reused": 1, "removed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
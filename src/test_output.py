@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from output import OutputFile, same_contents
+from pages import generate_page
+
+
+class TestOutputFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text):
+        output = OutputFile(self.path)
+        with output as f:
+            f.write(text)
+        return output.changed
+
+    def test_new_file_is_written(self):
+        self.assertTrue(self.write("hello"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "hello")
+
+    def test_identical_write_keeps_mtime(self):
+        self.write("hello")
+        os.utime(self.path, ns=(0, 10**9))
+        self.assertFalse(self.write("hello"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 10**9)
+
+    def test_changed_write_replaces(self):
+        self.write("hello")
+        self.assertTrue(self.write("hellO"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "hellO")
+
+    def test_failed_write_leaves_old_file(self):
+        self.write("hello")
+        with self.assertRaises(RuntimeError):
+            with OutputFile(self.path) as f:
+                f.write("half")
+                raise RuntimeError("render failed")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "hello")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_same_contents(self):
+        other = os.path.join(self.tmp.name, "other.html")
+        self.write("abc")
+        with open(other, "w") as f:
+            f.write("abd")
+        self.assertFalse(same_contents(self.path, other))
+        self.assertTrue(same_contents(self.path, self.path))
+
+    def test_regenerated_page_keeps_mtime(self):
+        source = os.path.join(self.tmp.name, "page.md")
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(source, "w") as f:
+            f.write("# Title\n\nBody")
+        with open(template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(source, template, self.path)
+            os.utime(self.path, ns=(0, 10**9))
+            generate_page(source, template, self.path)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 10**9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pages
+from manifest import new_manifest
+from template import Template
+from pages import extract_title, generate_pages_recursive
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            page_dir = os.path.join(self.content, f"section{i % 3}")
+            os.makedirs(page_dir, exist_ok=True)
+            with open(os.path.join(page_dir, f"page{i}.md"), "w") as f:
+                f.write(f"# Page {i}\n\nSome **bold** text and a [link](/page{i}.html)\n\n- one\n- two")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, dest, jobs, manifest=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return generate_pages_recursive(self.content, self.template, dest, manifest, jobs=jobs)
+
+    def read_tree(self, path):
+        files = {}
+        for root, dirs, names in os.walk(path):
+            for name in names:
+                full_path = os.path.join(root, name)
+                with open(full_path, "rb") as f:
+                    files[os.path.relpath(full_path, path)] = f.read()
+        return files
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("intro\n# Hello \n## Sub"), "Hello")
+        self.assertIsNone(extract_title("## Sub"))
+
+    def test_parallel_matches_serial(self):
+        serial = os.path.join(self.root, "serial")
+        parallel = os.path.join(self.root, "parallel")
+        self.build(serial, 1)
+        self.assertEqual(self.build(parallel, 3)["rebuilt"], 12)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_parallel_records_manifest(self):
+        dest = os.path.join(self.root, "public")
+        manifest = new_manifest()
+        self.build(dest, 3, manifest)
+        self.assertEqual(self.build(dest, 3, manifest)["reused"], 12)
+
+    def test_direct_renderer_matches_tree(self):
+        tree = os.path.join(self.root, "tree")
+        direct = os.path.join(self.root, "direct")
+        self.build(tree, 1)
+        with mock.patch.object(pages, "renderer", "direct"):
+            self.build(direct, 1)
+        self.assertEqual(self.read_tree(tree), self.read_tree(direct))
+
+    def test_serial_build_streams_pages(self):
+        # The default path writes pages through render_to, never holding a whole page
+        dest = os.path.join(self.root, "public")
+        with mock.patch.object(Template, "render", side_effect=AssertionError("page built in memory")):
+            self.assertEqual(self.build(dest, 1, new_manifest())["rebuilt"], 12)
+
+    def test_title_and_front_matter_are_escaped(self):
+        with open(os.path.join(self.content, "section0", "page0.md"), "w") as f:
+            f.write('---\ntitle: A < B & "C"\n---\ntext')
+        with open(os.path.join(self.content, "section1", "page1.md"), "w") as f:
+            f.write("# Q&A <draft>\n\ntext")
+        dest = os.path.join(self.root, "public")
+        self.build(dest, 1)
+        with open(os.path.join(dest, "section0", "page0.html")) as f:
+            self.assertTrue(f.read().startswith("<title>A &lt; B &amp; &quot;C&quot;</title>"))
+        with open(os.path.join(dest, "section1", "page1.html")) as f:
+            self.assertTrue(f.read().startswith("<title>Q&amp;A &lt;draft&gt;</title>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import unittest
+
+from manifest import new_manifest
+from partials import expand_includes, source_line
+from sitetest import SiteTestCase
+from template import load_template
+from watch import apply_changes, changed_paths, snapshot_site
+
+
+class TestPartials(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.partials, "nav.html"), "<nav>home</nav>")
+        self.write(os.path.join(self.partials, "note.md"), "A shared note")
+        self.write(self.template, "{{ include nav.html }}<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "a.md"), "# A\n\n{{ include note.md }}")
+        self.write(os.path.join(self.content, "b.md"), "# B")
+        self.manifest = new_manifest()
+
+    def build(self):
+        return self.generate(self.manifest, layouts_dir=self.layouts, partials_dir=self.partials)
+
+    def test_expand_nested(self):
+        self.write(os.path.join(self.partials, "outer.html"), "[{{ include nav.html }}]")
+        text, deps = expand_includes('x{{ include "outer.html" }}y', self.partials)
+        self.assertEqual(text, "x[<nav>home</nav>]y")
+        self.assertEqual(deps, {
+            os.path.join(self.partials, "outer.html"),
+            os.path.join(self.partials, "nav.html"),
+        })
+
+    def test_source_line(self):
+        self.write(os.path.join(self.partials, "three.md"), "1\n2\n3")
+        included = []
+        text, deps = expand_includes("a\n{{ include three.md }}\nb\n{{ include three.md }} c\nd", self.partials, included=included)
+        lines = text.split("\n")
+        self.assertEqual(lines, ["a", "1", "2", "3", "b", "1", "2", "3 c", "d"])
+        mapped = [source_line(i + 1, included) for i in range(len(lines))]
+        self.assertEqual(mapped, [1, 2, 2, 2, 3, 4, 4, 4, 5])
+
+    def test_cycle_is_an_error(self):
+        self.write(os.path.join(self.partials, "loop.html"), "{{ include loop.html }}")
+        with self.assertRaises(ValueError):
+            expand_includes("{{ include loop.html }}", self.partials)
+
+    def test_missing_partial_is_an_error(self):
+        with self.assertRaises(ValueError):
+            expand_includes("{{ include nope.html }}", self.partials)
+
+    def test_build_expands_and_records_deps(self):
+        self.build()
+        self.assertIn("<nav>home</nav>", self.read("b.html"))
+        self.assertIn("A shared note", self.read("a.html"))
+        nav = os.path.join(self.partials, "nav.html")
+        note = os.path.join(self.partials, "note.md")
+        a = self.manifest["pages"][os.path.join(self.content, "a.md")]
+        b = self.manifest["pages"][os.path.join(self.content, "b.md")]
+        self.assertEqual(sorted(a["deps"]), [nav, note])
+        self.assertEqual(sorted(b["deps"]), [nav])
+
+    def test_partial_edit_rebuilds_only_dependent_pages(self):
+        self.build()
+        self.write(os.path.join(self.partials, "note.md"), "An edited note")
+        self.assertEqual(self.build(), {"rebuilt": 1, "reused": 1, "removed": 0})
+        self.assertIn("An edited note", self.read("a.html"))
+
+    def test_template_partial_edit_reloads_template(self):
+        self.build()
+        self.write(os.path.join(self.partials, "nav.html"), "<nav>new</nav>")
+        self.assertEqual(self.build()["rebuilt"], 2)
+        self.assertIn("<nav>new</nav>", self.read("b.html"))
+
+    def test_load_template_tracks_partials(self):
+        template = load_template(self.template, self.partials)
+        self.assertEqual(template.deps, {os.path.join(self.partials, "nav.html")})
+        self.assertIs(load_template(self.template, self.partials), template)
+        self.write(os.path.join(self.partials, "nav.html"), "<nav>x</nav>")
+        self.assertIsNot(load_template(self.template, self.partials), template)
+
+    def test_watch_rebuilds_dependent_pages(self):
+        self.build()
+        previous = snapshot_site(self.content, self.template, self.static, self.layouts, self.partials)
+        self.write(os.path.join(self.partials, "note.md"), "Watched note")
+        current = snapshot_site(self.content, self.template, self.static, self.layouts, self.partials)
+        done = self.quietly(
+            apply_changes, changed_paths(previous, current), self.content, self.template, self.static,
+            self.public, self.manifest, self.layouts, partials_dir=self.partials,
+        )
+        self.assertEqual(done, [os.path.join(self.content, "a.md")])
+        self.assertIn("Watched note", self.read("a.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import batched, bounded_map
+
+
+class TestPipeline(unittest.TestCase):
+    def test_inline_map_is_lazy(self):
+        seen = []
+        results = bounded_map(lambda x: seen.append(x) or x * 2, range(3))
+        self.assertEqual(seen, [])
+        self.assertEqual(list(results), [0, 2, 4])
+
+    def test_results_keep_order(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertEqual(list(bounded_map(str, range(100), executor, 8)), [str(i) for i in range(100)])
+
+    def test_limit_bounds_items_pulled_ahead(self):
+        pulled = []
+        release = threading.Event()
+
+        def items():
+            for i in range(50):
+                pulled.append(i)
+                yield i
+
+        def slow(x):
+            release.wait()
+            return x
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = bounded_map(slow, items(), executor, 5)
+            threading.Timer(0.05, release.set).start()
+            self.assertEqual(next(results), 0)
+            self.assertLessEqual(len(pulled), 6)
+            self.assertEqual(list(results), list(range(1, 50)))
+
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batched([], 2)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import json
+import os
+import unittest
+
+from delimiter import markdown_to_html_node
+from manifest import new_manifest
+from search import INDEX_VERSION, SearchIndex, page_terms
+from sitetest import SiteTestCase
+
+
+class TestSearchIndex(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.search_dir = os.path.join(self.public, "search")
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to the **Shire**")
+        self.write(os.path.join(self.content, "rivendell.md"), "# Rivendell\n\nThe [shire](/index.html) is far")
+        self.manifest = new_manifest()
+
+    def build(self):
+        return self.generate(self.manifest, search=SearchIndex(self.search_dir))
+
+    def shard(self, prefix):
+        with open(os.path.join(self.search_dir, f"{prefix}.json")) as f:
+            return json.load(f)
+
+    def test_page_terms(self):
+        texts = []
+        markdown_to_html_node("# A Title\n\nSome *title* text and `code`", texts=texts)
+        self.assertEqual(page_terms(texts), {"title": 2, "some": 1, "text": 1, "and": 1, "code": 1})
+
+    def test_build_writes_shards(self):
+        self.build()
+        self.assertEqual(self.shard("sh")["shire"], {"/index.html": 1, "/rivendell.html": 1})
+        self.assertEqual(self.shard("ri")["rivendell"], {"/rivendell.html": 1})
+        with open(os.path.join(self.search_dir, "docs.json")) as f:
+            docs = json.load(f)
+        self.assertEqual(docs, {
+            "prefix": 2, "version": INDEX_VERSION, "docs": {"/index.html": "Home", "/rivendell.html": "Rivendell"},
+        })
+        entry = self.manifest["pages"][os.path.join(self.content, "index.md")]
+        self.assertEqual(entry["search"], ["home", "shire", "the", "to", "welcome"])
+
+    def test_changed_page_updates_its_terms(self):
+        self.build()
+        mtime = os.stat(os.path.join(self.search_dir, "ri.json")).st_mtime_ns
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to Mordor")
+        self.assertEqual(self.build()["rebuilt"], 1)
+        self.assertEqual(self.shard("sh")["shire"], {"/rivendell.html": 1})
+        self.assertEqual(self.shard("mo")["mordor"], {"/index.html": 1})
+        self.assertEqual(os.stat(os.path.join(self.search_dir, "ri.json")).st_mtime_ns, mtime)
+
+    def test_removed_page_leaves_the_index(self):
+        self.build()
+        os.remove(os.path.join(self.content, "rivendell.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.search_dir, "ri.json")))
+        self.assertEqual(self.shard("sh")["shire"], {"/index.html": 1})
+
+    def test_older_index_is_rebuilt(self):
+        self.write(os.path.join(self.search_dir, "docs.json"), '{"prefix": 2, "docs": {"/gone.html": "Gone"}}')
+        self.write(os.path.join(self.search_dir, "go.json"), '{"gone": {"/gone.html": 1}}')
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.search_dir, "go.json")))
+        self.assertNotIn("gone", self.shard("sh"))
+
+    def test_enabling_search_rebuilds_pages(self):
+        self.generate(self.manifest)
+        self.assertEqual(self.build()["rebuilt"], 2)
+        self.assertIn("shire", self.shard("sh"))
+
+
+if __name__ == "__main__":
+    unittest.main()
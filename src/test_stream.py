@@ -0,0 +1,116 @@
+import io
+import os
+import random
+import unittest
+from unittest import mock
+
+import pages
+from delimiter import markdown_to_blocks, markdown_to_html_node
+from manifest import new_manifest
+from pages import generate_pages_recursive
+from sitetest import SiteTestCase
+from stream import StreamedBody, iter_blocks, scan_title
+
+SAMPLE = """# Title
+
+Some **bold** and _italic_ text with a [link](/a.html)
+spread over two lines
+
+
+
+- one
+- two
+
+
+```
+code
+```
+
+
+
+> quote
+> ![img](/i.png)
+
+1. first
+2. second
+
+See [the spec][spec].
+
+[spec]: /spec.html
+
+   
+
+The end.
+"""
+
+
+class TestIterBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        for chunk_size in (1, 2, 3, 7, 4096):
+            blocks = [block for line, block in iter_blocks(io.StringIO(SAMPLE), chunk_size=chunk_size)]
+            self.assertEqual(blocks, markdown_to_blocks(SAMPLE))
+
+    def test_random_separators(self):
+        rng = random.Random(7)
+        pieces = ["a", "b c", "\n", "\n\n", "\n\n\n", " ", "  \n"]
+        for _ in range(300):
+            markdown = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+            blocks = [block for line, block in iter_blocks(io.StringIO(markdown), chunk_size=rng.randint(1, 5))]
+            self.assertEqual(blocks, markdown_to_blocks(markdown), repr(markdown))
+
+    def test_lines(self):
+        lines = dict((block, line) for line, block in iter_blocks(io.StringIO(SAMPLE), chunk_size=5))
+        source = SAMPLE.split("\n")
+        for block, line in lines.items():
+            self.assertEqual(source[line - 1].strip(), block.split("\n")[0])
+
+    def test_scan_title_keeps_position(self):
+        f = io.StringIO("intro\n## Sub\n# Hello \nrest")
+        self.assertEqual(scan_title(f), "Hello")
+        self.assertEqual(f.read(), "intro\n## Sub\n# Hello \nrest")
+
+
+class TestStreamedBody(unittest.TestCase):
+    def test_matches_node_tree(self):
+        body = StreamedBody(io.StringIO(SAMPLE), 1, "partials", set())
+        links = []
+        texts = []
+        expected = markdown_to_html_node(SAMPLE, links, texts).to_html()
+        self.assertEqual(body.to_html(), expected)
+        self.assertEqual(body.links, links)
+        self.assertEqual(body.links, [[3, "/a.html"], [19, "/i.png"], [24, "/spec.html"]])
+
+    def test_whitespace_only_blocks_match(self):
+        for markdown in ("a\n\n \n\nb", " ", "a\n\n\t\n\n\n\n  \n\nb\n\n"):
+            body = StreamedBody(io.StringIO(markdown), 1, "partials", set())
+            self.assertEqual(body.to_html(), markdown_to_html_node(markdown).to_html(), repr(markdown))
+
+
+class TestStreamedPages(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "---\nauthor: me\n---\nintro\n\n" + SAMPLE)
+
+    def build(self, dest, manifest):
+        self.quietly(generate_pages_recursive, self.content, self.template, dest, manifest)
+        with open(os.path.join(dest, "index.html"), "r") as f:
+            return f.read()
+
+    def test_streamed_page_matches(self):
+        whole_manifest = new_manifest()
+        whole = self.build(os.path.join(self.root, "whole"), whole_manifest)
+        streamed_manifest = new_manifest()
+        with mock.patch.object(pages, "STREAM_MIN_BYTES", 0):
+            streamed = self.build(os.path.join(self.root, "streamed"), streamed_manifest)
+        self.assertEqual(streamed, whole)
+        self.assertTrue(streamed.startswith("<title>Title</title><div><p>intro</p>"))
+        markdown_path = os.path.join(self.content, "index.md")
+        whole_entry = whole_manifest["pages"][markdown_path]
+        streamed_entry = streamed_manifest["pages"][markdown_path]
+        self.assertEqual(streamed_entry["links"], whole_entry["links"])
+        self.assertEqual(streamed_entry["output"], whole_entry["output"])
+
+
+if __name__ == "__main__":
+    unittest.main()
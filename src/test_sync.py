@@ -0,0 +1,97 @@
+import contextlib
+import io
+import os
+import unittest
+
+from main import main
+from sitetest import SiteTestCase
+from sync import sync_files
+
+
+class TestSyncFiles(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "logo.png"), "png")
+
+    def sync(self, previous=None, use_hash=False, reserved=()):
+        return self.quietly(sync_files, self.static, self.public, previous, use_hash, reserved=reserved)
+
+    def test_first_sync_copies_everything(self):
+        synced, stats = self.sync()
+        self.assertEqual(synced, {"index.css": 7, os.path.join("images", "logo.png"): 3})
+        self.assertEqual((stats["copied"], stats["skipped"]), (2, 0))
+        self.assertEqual(self.read("images", "logo.png"), "png")
+
+    def test_unchanged_files_are_skipped(self):
+        synced, stats = self.sync()
+        synced, stats = self.sync(synced)
+        self.assertEqual((stats["copied"], stats["skipped"], stats["skipped_bytes"]), (0, 2, 10))
+
+    def test_changed_file_is_copied(self):
+        synced, stats = self.sync()
+        self.write(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+        synced, stats = self.sync(synced)
+        self.assertEqual((stats["copied"], stats["skipped"]), (1, 1))
+        self.assertEqual(self.read("index.css"), "body { margin: 0 }")
+
+    def test_hash_mode_skips_touched_files(self):
+        synced, stats = self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(0, 10**18))
+        synced, stats = self.sync(synced, use_hash=True)
+        self.assertEqual((stats["copied"], stats["skipped"]), (0, 2))
+        self.assertEqual(os.stat(os.path.join(self.public, "index.css")).st_mtime_ns, 10**18)
+
+    def test_deleted_source_is_removed(self):
+        synced, stats = self.sync()
+        self.write(os.path.join(self.public, "page.html"), "generated")
+        os.remove(os.path.join(self.static, "images", "logo.png"))
+        synced, stats = self.sync(synced)
+        self.assertEqual((stats["removed"], stats["removed_bytes"]), (1, 3))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "page.html")))
+
+    def test_reserved_paths_are_left_alone(self):
+        synced, stats = self.sync()
+        self.write(os.path.join(self.public, "index.css"), "page")
+        synced, stats = self.sync(synced, reserved={"index.css"})
+        self.assertEqual(synced, {os.path.join("images", "logo.png"): 3})
+        self.assertEqual((stats["copied"], stats["removed"]), (0, 0))
+        self.assertEqual(self.read("index.css"), "page")
+
+
+class TestStaticPageCollision(SiteTestCase):
+    # static/index.html and content/index.md are both written to public/index.html
+    def setUp(self):
+        super().setUp()
+        self.cwd = os.getcwd()
+        os.chdir(self.root)
+        self.write(self.template, "<main>{{ Content }}</main>")
+        self.write(os.path.join(self.static, "index.html"), "static")
+        self.write(os.path.join(self.content, "index.md"), "# Page")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        super().tearDown()
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            main(["build"])
+        return self.read("index.html"), out.getvalue()
+
+    def test_page_wins_and_is_not_rewritten(self):
+        html, out = self.build()
+        self.assertIn("<h1>Page</h1>", html)
+        html, out = self.build()
+        self.assertIn("<h1>Page</h1>", html)
+        self.assertIn("Static: 0 copied", out)
+        self.assertIn("Pages: 0 rebuilt", out)
+
+    def test_deleting_the_page_restores_the_static_file(self):
+        self.build()
+        os.remove(os.path.join(self.content, "index.md"))
+        self.assertEqual(self.build()[0], "static")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pages import split_front_matter
+from template import compile_template, load_template, select_layout, clear_template_cache
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self):
+        template = compile_template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertEqual(template.chunks, ["<title>", "</title><main>", "</main>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+
+    def test_render(self):
+        template = compile_template("<h1>{{ Title }}</h1>{{ Content }}<p>{{ Title }}</p>")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<h1>Hi</h1><p>x</p><p>Hi</p>",
+        )
+
+    def test_unknown_placeholder_is_kept(self):
+        template = compile_template("{{ Content }}{{ Missing }}")
+        self.assertEqual(template.render({"Content": "x"}), "x{{ Missing }}")
+
+    def test_content_is_not_rescanned(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "{{ Title }}"}),
+            "<title>T</title>{{ Title }}",
+        )
+
+    def test_render_to(self):
+        template = compile_template("a{{ X }}b")
+        out = io.StringIO()
+        template.render_to(out, {"X": "-"})
+        self.assertEqual(out.getvalue(), "a-b")
+
+    def test_front_matter(self):
+        meta, body = split_front_matter("---\nlayout: post\ndate: 2024-01-01\n---\n# Hi")
+        self.assertEqual(meta, {"layout": "post", "date": "2024-01-01"})
+        self.assertEqual(body, "# Hi")
+        self.assertEqual(split_front_matter("---\n\nnot front matter"), ({}, "---\n\nnot front matter"))
+
+
+class TestLayouts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.layouts = os.path.join(self.root, "layouts")
+        self.default = os.path.join(self.root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog", "2024"))
+        os.makedirs(self.layouts)
+        for name in ("post", "page"):
+            with open(os.path.join(self.layouts, name + ".html"), "w") as f:
+                f.write(name + "{{ Content }}")
+        with open(os.path.join(self.content, "blog", ".layout"), "w") as f:
+            f.write("post\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+        clear_template_cache()
+
+    def select(self, *parts, meta=None):
+        path = os.path.join(self.content, *parts)
+        return select_layout(path, self.content, meta or {}, self.default, self.layouts, {})
+
+    def test_default(self):
+        self.assertEqual(self.select("index.md"), self.default)
+
+    def test_directory_layout(self):
+        self.assertEqual(self.select("blog", "2024", "a.md"), os.path.join(self.layouts, "post.html"))
+
+    def test_front_matter_wins(self):
+        self.assertEqual(
+            self.select("blog", "a.md", meta={"layout": "page"}),
+            os.path.join(self.layouts, "page.html"),
+        )
+
+    def test_unknown_layout(self):
+        with self.assertRaises(ValueError):
+            self.select("a.md", meta={"layout": "nope"})
+
+    def test_load_template_is_cached(self):
+        path = os.path.join(self.layouts, "post.html")
+        self.assertIs(load_template(path), load_template(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
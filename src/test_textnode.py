@@ -24,6 +24,11 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.TEXT, "https://www.boot.dev")
         self.assertEqual(node, node2)
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertIs(node.text_type, TextNode("other", TextType.TEXT).text_type)
+
     def test_repr(self):
         node = TextNode("This is a text node", TextType.TEXT, "https://www.boot.dev")
         self.assertEqual(
@@ -48,6 +53,16 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
             {"src": "https://www.boot.dev", "alt": "This is an image"},
         )
 
+    def test_escapes(self):
+        node = TextNode("<b> & co", TextType.TEXT)
+        self.assertEqual(node.to_html(), "&lt;b&gt; &amp; co")
+        self.assertEqual(node.to_html(), text_node_to_html_node(node).to_html())
+        node = TextNode('say "x"', TextType.IMAGE, "/a b&c.png")
+        self.assertEqual(node.to_html(), '<img src="/a b&amp;c.png" alt="say &quot;x&quot;">')
+        node = TextNode("a<b", TextType.LINK, "/q?a=1&b=2")
+        self.assertEqual(node.to_html(), '<a href="/q?a=1&amp;b=2">a&lt;b</a>')
+        self.assertEqual(node.to_html(), text_node_to_html_node(node).to_html())
+
     def test_bold(self):
         node = TextNode("This is bold", TextType.BOLD)
         html_node = text_node_to_html_node(node)
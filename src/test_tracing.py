@@ -0,0 +1,64 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import tracing
+from pages import generate_page
+
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        tracing.disable()
+        tracing.take_events()
+
+    def test_disabled_records_nothing(self):
+        with tracing.span("page", path="x"):
+            pass
+        self.assertIs(tracing.span("page"), tracing.NULL_SPAN)
+        self.assertEqual(tracing.take_events(), [])
+
+    def test_enabled_records_spans(self):
+        tracing.enable()
+        with tracing.span("page", path="a.md"):
+            with tracing.span("read"):
+                pass
+        events = tracing.take_events()
+        self.assertEqual([event["name"] for event in events], ["read", "page"])
+        self.assertEqual(events[1]["args"], {"path": "a.md"})
+        self.assertEqual(events[1]["ph"], "X")
+        self.assertGreaterEqual(events[1]["dur"], events[0]["dur"])
+
+    def test_traced_page_has_every_stage_and_same_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "page.md")
+            template = os.path.join(tmp, "template.html")
+            with open(source, "w") as f:
+                f.write("# Title\n\nSome **text**\n\n- a\n- b")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            plain = os.path.join(tmp, "plain.html")
+            traced = os.path.join(tmp, "traced.html")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, template, plain)
+                tracing.enable()
+                generate_page(source, template, traced)
+            events = tracing.take_events()
+            self.assertEqual(
+                sorted(event["name"] for event in events),
+                sorted(["page", "read", "block split", "block classify", "inline parse",
+                        "render", "template fill", "write"]),
+            )
+            with open(plain) as a, open(traced) as b:
+                self.assertEqual(a.read(), b.read())
+
+            trace_path = os.path.join(tmp, "trace.json")
+            tracing.write_chrome_trace(events, trace_path)
+            with open(trace_path) as f:
+                self.assertEqual(len(json.load(f)["traceEvents"]), 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
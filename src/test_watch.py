@@ -0,0 +1,99 @@
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+from main import copy_files
+from manifest import new_manifest
+from sitetest import SiteTestCase
+from watch import apply_changes, changed_paths, snapshot_site, watch
+
+
+class TestWatch(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "a.md"), "# A")
+        self.write(os.path.join(self.content, "b.md"), "# B")
+        self.write(os.path.join(self.static, "site.css"), "body {}")
+        self.manifest = new_manifest()
+        self.quietly(copy_files, self.static, self.public, self.manifest)
+        self.generate(self.manifest, layouts_dir=self.layouts)
+        self.previous = self.snapshot()
+
+    def snapshot(self):
+        return snapshot_site(self.content, self.template, self.static, self.layouts)
+
+    def apply(self):
+        current = self.snapshot()
+        changed = changed_paths(self.previous, current)
+        self.previous = current
+        self.outputs = []
+        return changed, self.quietly(
+            apply_changes, changed, self.content, self.template, self.static, self.public, self.manifest,
+            self.layouts, outputs=self.outputs,
+        )
+
+    def test_edit_rebuilds_one_page(self):
+        path = os.path.join(self.content, "a.md")
+        self.write(path, "# A2")
+        changed, done = self.apply()
+        self.assertEqual(changed, [path])
+        self.assertEqual(done, [path])
+        self.assertIn("A2", self.read("a.html"))
+        self.assertEqual(self.outputs, [os.path.join(self.public, "a.html")])
+
+    def test_deleted_page_is_removed(self):
+        os.remove(os.path.join(self.content, "b.md"))
+        self.apply()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "b.html")))
+        self.assertNotIn(os.path.join(self.content, "b.md"), self.manifest["pages"])
+
+    def test_template_edit_rebuilds_all_pages(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        changed, done = self.apply()
+        self.assertEqual(done, ["2 pages for a template change"])
+        self.assertTrue(self.read("b.html").startswith("<h1>B</h1>"))
+
+    def test_static_change_copies_one_file(self):
+        self.write(os.path.join(self.static, "site.css"), "body { color: red }")
+        changed, done = self.apply()
+        self.assertEqual(len(done), 1)
+        self.assertEqual(self.read("site.css"), "body { color: red }")
+
+    def test_static_file_does_not_overwrite_page(self):
+        self.write(os.path.join(self.static, "a.html"), "static")
+        changed, done = self.apply()
+        self.assertEqual(done, [])
+        self.assertIn("<h1>A</h1>", self.read("a.html"))
+
+    def test_watch_recovers_from_invalid_markdown(self):
+        path = os.path.join(self.content, "a.md")
+        # Each poll of the watch loop makes the next edit, then stops it
+        edits = [
+            lambda: self.write(path, "# A\n\nBroken **bold"),
+            lambda: self.write(path, "# A\n\nFixed **bold**"),
+        ]
+
+        def poll(interval):
+            if not edits:
+                raise KeyboardInterrupt
+            edits.pop(0)()
+
+        manifest_path = os.path.join(self.root, "manifest.json")
+        with mock.patch("watch.time.sleep", poll), contextlib.redirect_stdout(io.StringIO()) as out:
+            watch(
+                self.content, self.template, self.static, self.public, self.manifest, manifest_path,
+                layouts_dir=self.layouts,
+            )
+        self.assertIn(f"Rebuild failed: {path}: Invalid markdown", out.getvalue())
+        self.assertIn("Rebuilt in", out.getvalue())
+        self.assertIn("<b>bold</b>", self.read("a.html"))
+
+    def test_no_changes(self):
+        self.assertEqual(self.apply(), ([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
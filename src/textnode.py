@@ -1,4 +1,6 @@
-from htmlnode import LeafNode
+from assets import asset_url
+from images import image_props
+from htmlnode import LeafNode, escape_attribute, escape_text
 from enum import Enum
 
 
@@ -14,6 +16,10 @@ class TextType(Enum):
 
 class TextNode:
     # Represents a text node in the markdown tree
+    # text_type holds the enum's value, which is the same shared string object
+    # for every node of a type, so the slots are the only per-node cost
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type.value
@@ -31,20 +37,35 @@ class TextNode:
 
     def to_html(self):
         if self.text_type == "text":
-            return self.text
+            return escape_text(self.text)
         elif self.text_type == "bold":
-            return f"<b>{self.text}</b>"
+            return f"<b>{escape_text(self.text)}</b>"
         elif self.text_type == "italic":
-            return f"<i>{self.text}</i>"
+            return f"<i>{escape_text(self.text)}</i>"
         elif self.text_type == "code":
-            return f"<code>{self.text}</code>"
+            return f"<code>{escape_text(self.text)}</code>"
         elif self.text_type == "link":
-            return f'<a href="{self.url}">{self.text}</a>'
+            return f'<a href="{escape_attribute(asset_url(self.url))}">{escape_text(self.text)}</a>'
         elif self.text_type == "image":
-            return f'<img src="{self.url}" alt="{self.text}">'
+            props = image_props(self.url)
+            alt = escape_attribute(self.text)
+            if props is None:
+                return f'<img src="{escape_attribute(asset_url(self.url))}" alt="{alt}">'
+            src = props.pop("src", None) or asset_url(self.url)
+            attrs = "".join(f' {key}="{escape_attribute(value)}"' for key, value in props.items())
+            return f'<img src="{escape_attribute(src)}" alt="{alt}"{attrs}>'
         else:
             raise ValueError(f"Invalid text_type: {self.text_type}")
 
+    def iter_html(self):
+        yield self.to_html()
+
+    def render_to(self, fp):
+        fp.write(self.to_html())
+
+    def write_chunks(self, chunks, fp):
+        chunks.append(self.to_html())
+
 def text_node_to_html_node(text_node):
     # Convert a text node to an HTML node
     if text_node.text_type == TextType.TEXT.value:
@@ -56,7 +77,9 @@ def text_node_to_html_node(text_node):
     if text_node.text_type == TextType.CODE.value:
         return LeafNode("code", text_node.text)
     if text_node.text_type == TextType.LINK.value:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return LeafNode("a", text_node.text, {"href": asset_url(text_node.url)})
     if text_node.text_type == TextType.IMAGE.value:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        props = {"src": asset_url(text_node.url), "alt": text_node.text}
+        props.update(image_props(text_node.url) or {})
+        return LeafNode("img", "", props)
     raise ValueError(f"Invalid text type: {text_node.text_type}")
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+
+enabled = False
+events = []
+
+
+class Span:
+    # Times a block of code and records it as a Chrome trace "complete" event
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        events.append({
+            "name": self.name,
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": (end - self.start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": self.args,
+        })
+        return False
+
+
+class NullSpan:
+    # Stands in for Span while tracing is off, so a disabled span costs one call
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+def span(name, **args):
+    if not enabled:
+        return NULL_SPAN
+    return Span(name, args)
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def take_events():
+    # Return the recorded events and start a fresh list
+    global events
+    taken = events
+    events = []
+    return taken
+
+
+def write_chrome_trace(trace_events, path):
+    # Write events in the Chrome trace format that chrome://tracing and Perfetto load
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+
+def summarize(trace_events, count=20):
+    # Print the slowest pages with their per-stage times, and totals per stage
+    pages = [event for event in trace_events if event["name"] == "page"]
+    stages = {}
+    for event in trace_events:
+        if event["name"] != "page":
+            stages[event["name"]] = stages.get(event["name"], 0.0) + event["dur"]
+
+    print(f"Slowest {min(count, len(pages))} of {len(pages)} pages:")
+    for page in sorted(pages, key=lambda event: event["dur"], reverse=True)[:count]:
+        breakdown = ", ".join(
+            f"{event['name']} {event['dur'] / 1000:.2f}"
+            for event in trace_events
+            if event["name"] != "page"
+            and event["pid"] == page["pid"]
+            and event["tid"] == page["tid"]
+            and page["ts"] <= event["ts"] <= page["ts"] + page["dur"]
+        )
+        print(f"  {page['dur'] / 1000:8.2f} ms  {page['args'].get('path')}  ({breakdown})")
+    print("Time per stage:")
+    for name, total in sorted(stages.items(), key=lambda item: item[1], reverse=True):
+        print(f"  {total / 1000:8.2f} ms  {name}")
@@ -0,0 +1,184 @@
+import os
+import shutil
+import time
+
+from compress import compress_changed
+from discovery import walk_files
+from images import IMAGE_TYPES, update_image_info
+from manifest import remove_empty_dirs, remove_stale_outputs, save_manifest
+from pages import generate_pages_recursive, generate_single_page, page_route
+from template import LAYOUT_FILE
+
+
+def snapshot(path, files=None):
+    # Map every file under path to its (mtime, size), using the stat data scandir returns
+    if files is None:
+        files = {}
+    for relative_path, entry in walk_files(path):
+        stat = entry.stat()
+        files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def snapshot_site(dir_path_content, template_path, static_dir, layouts_dir, partials_dir="partials"):
+    # Snapshot every input of the build
+    files = {}
+    for path in (dir_path_content, static_dir, layouts_dir, partials_dir):
+        snapshot(path, files)
+    if os.path.exists(template_path):
+        stat = os.stat(template_path)
+        files[template_path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def changed_paths(previous, current):
+    # Return the files that were added, modified or deleted between two snapshots
+    changed = [path for path, state in current.items() if previous.get(path) != state]
+    changed.extend(path for path in previous if path not in current)
+    return sorted(changed)
+
+
+def is_under(path, directory):
+    return path.startswith(os.path.join(directory, ""))
+
+
+def pages_using(partial_path, manifest):
+    # Return the pages whose last render included the given partial
+    return sorted(
+        markdown_path
+        for markdown_path, entry in manifest["pages"].items()
+        if partial_path in entry.get("deps", {})
+    )
+
+
+def page_outputs(entries):
+    # Return the output paths of some manifest page entries
+    return [entry["dest"] for entry in entries if entry and entry.get("dest")]
+
+
+def apply_changes(changed, dir_path_content, template_path, static_dir, dest_dir_path, manifest, layouts_dir, cache=None, partials_dir="partials", inline_images=None, search=None, outputs=None):
+    # Do the least work that brings the output up to date with the changed files
+    # Returns a short description of what was rebuilt
+    # With an outputs list, the paths of outputs written or removed are appended to it
+    if outputs is None:
+        outputs = []
+    templates_changed = any(
+        path == template_path
+        or is_under(path, layouts_dir)
+        or (is_under(path, dir_path_content) and os.path.basename(path) == LAYOUT_FILE)
+        for path in changed
+    )
+    # With image attributes on, new image dimensions rebuild every page
+    if inline_images is not None and any(
+        is_under(path, static_dir) and os.path.splitext(path)[1].lower() in IMAGE_TYPES
+        for path in changed
+    ):
+        if update_image_info(static_dir, manifest, inline_images):
+            templates_changed = True
+    if templates_changed:
+        # The manifest keeps every page whose layout did not change
+        outputs.extend(page_outputs(manifest["pages"].values()))
+        stats = generate_pages_recursive(
+            dir_path_content, template_path, dest_dir_path, manifest,
+            layouts_dir=layouts_dir, cache=cache, partials_dir=partials_dir, search=search,
+        )
+        outputs.extend(page_outputs(manifest["pages"].values()))
+        done = [f"{stats['rebuilt']} pages for a template change"]
+    else:
+        done = []
+        # A partial change rebuilds only the pages that included it
+        pages = set()
+        for path in changed:
+            if is_under(path, partials_dir):
+                pages.update(pages_using(path, manifest))
+        for path in sorted(pages):
+            if os.path.exists(path) and path not in changed:
+                generate_single_page(
+                    path, dir_path_content, template_path, dest_dir_path, manifest, layouts_dir, cache, partials_dir,
+                    search,
+                )
+                outputs.extend(page_outputs([manifest["pages"].get(path)]))
+                done.append(path)
+        for path in changed:
+            if not is_under(path, dir_path_content) or not path.endswith(".md"):
+                continue
+            if os.path.exists(path):
+                generate_single_page(
+                    path, dir_path_content, template_path, dest_dir_path, manifest, layouts_dir, cache, partials_dir,
+                    search,
+                )
+                outputs.extend(page_outputs([manifest["pages"].get(path)]))
+                done.append(path)
+            elif path in manifest["pages"]:
+                entry = manifest["pages"].pop(path)
+                if search is not None:
+                    search.remove(page_route(entry["dest"], dest_dir_path), entry.get("search", ()))
+                    search.write()
+                remove_stale_outputs({path: entry}, {}, dest_dir_path)
+                outputs.extend(page_outputs([entry]))
+                done.append(f"removed {path}")
+
+    # Static files never overwrite a page written to the same path
+    page_paths = set(page_outputs(manifest["pages"].values()))
+    for path in changed:
+        if not is_under(path, static_dir):
+            continue
+        relative_path = os.path.relpath(path, static_dir)
+        destination_file = os.path.join(dest_dir_path, relative_path)
+        if destination_file in page_paths:
+            continue
+        if os.path.exists(path):
+            os.makedirs(os.path.dirname(destination_file), exist_ok=True)
+            shutil.copy2(path, destination_file)
+            outputs.append(destination_file)
+            manifest["assets"][relative_path] = os.path.getsize(path)
+            done.append(f"copied {path}")
+        elif manifest["assets"].pop(relative_path, None) is not None:
+            if os.path.exists(destination_file):
+                os.remove(destination_file)
+                remove_empty_dirs(os.path.dirname(destination_file), dest_dir_path)
+            outputs.append(destination_file)
+            done.append(f"removed {destination_file}")
+    if search is not None and done:
+        outputs.extend(entry.path for relative_path, entry in walk_files(search.directory))
+    return done
+
+
+def watch(dir_path_content, template_path, static_dir, dest_dir_path, manifest, manifest_path, layouts_dir="layouts", interval=0.1, cache=None, partials_dir="partials", compress_min_size=None, inline_images=None, search=None):
+    # Poll the site inputs and rebuild only what each change affects
+    # With compress_min_size, the compressed siblings of the outputs each
+    # rebuild touched are refreshed
+    # A batch that fails on a mistake in the site's files, like invalid
+    # markdown or a missing partial, is reported and tried again with the
+    # next change; pages it left unbuilt keep their stale manifest entries
+    print(f"Watching {dir_path_content}, {template_path}, {static_dir}, {layouts_dir} and {partials_dir} (Ctrl+C to stop)")
+    previous = snapshot_site(dir_path_content, template_path, static_dir, layouts_dir, partials_dir)
+    failed = []
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot_site(dir_path_content, template_path, static_dir, layouts_dir, partials_dir)
+            changed = changed_paths(previous, current)
+            previous = current
+            if not changed:
+                continue
+            changed = sorted(set(changed).union(failed))
+            start = time.perf_counter()
+            outputs = []
+            try:
+                done = apply_changes(
+                    changed, dir_path_content, template_path, static_dir, dest_dir_path, manifest, layouts_dir, cache,
+                    partials_dir, inline_images, search, outputs,
+                )
+            except (ValueError, OSError) as error:
+                print(f"Rebuild failed: {error}")
+                failed = changed
+                continue
+            failed = []
+            if compress_min_size is not None:
+                compress_changed(outputs, compress_min_size, manifest)
+            save_manifest(manifest, manifest_path)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"Rebuilt in {elapsed:.1f} ms: {', '.join(done) or 'nothing to do'}")
+    except KeyboardInterrupt:
+        print("Stopped watching")